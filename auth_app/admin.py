@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import Profile
+from coderr_app.queries.account_deletion import start_account_deletion
+from .models import AccountDeletionJob, Profile
 
 
 class ProfileInline(admin.StackedInline):
@@ -29,6 +30,18 @@ class UserAdmin(BaseUserAdmin):
         return full if full else obj.username
     get_fullname_fallback.short_description = 'Voller Name'
 
+    def get_deleted_objects(self, objs, request):
+        """Skips collecting the whole cascade for the confirmation page, the purge runs in the background"""
+        deleted = [f'{obj} (Daten werden im Hintergrund gelöscht)' for obj in objs]
+        return deleted, {'Benutzer': len(deleted)}, set(), []
+
+    def delete_model(self, request, obj):
+        start_account_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            start_account_deletion(user)
+
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
 
@@ -39,3 +52,18 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'type', 'location', 'tel')
     search_fields = ('user__username', 'user__email', 'location')
     list_filter = ('type',)
+
+
+@admin.register(AccountDeletionJob)
+class AccountDeletionJobAdmin(admin.ModelAdmin):
+    """Shows account purges read-only, resume_account_deletions restarts failed or interrupted ones"""
+    list_display = ('id', 'username', 'account_id', 'status', 'stage', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('username', 'account_id')
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
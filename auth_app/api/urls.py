@@ -1,9 +1,10 @@
 """Contains all authorization and authentification urls"""
 from django.urls import path
-from auth_app.api.views import RegistrationView, LoginView
+from auth_app.api.views import RegistrationView, LoginView, AccountView
 
 
 urlpatterns = [
     path('registration/', RegistrationView.as_view(), name='registration'),
     path('login/', LoginView.as_view(), name='login'),
+    path('account/', AccountView.as_view(), name='account'),
 ]
\ No newline at end of file
@@ -1,16 +1,21 @@
-"""Provides the two views for registration and authentication"""
+"""Provides the views for registration, authentication and account deletion"""
 from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.models import Token
 from auth_app.api.serializers import RegistrationSerializer, LoginSerializer
+from core.utils.throttling import IPThrottle, UsernameThrottle
+from coderr_app.queries.account_deletion import start_account_deletion
 
 
 class RegistrationView(APIView):
     """Handles user registration and returns token and basic user info"""
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [IPThrottle]
+    throttle_scope = 'registration'
 
     @transaction.atomic
     def post(self, request):
@@ -36,6 +41,8 @@ class LoginView(APIView):
     """Authenticates a user and returns a token with basic user info"""
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [IPThrottle, UsernameThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -54,4 +61,20 @@ class LoginView(APIView):
                 "user_id": user.id,
             },
             status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+        )
+
+
+class AccountView(APIView):
+    """Deletes the own account: login is disabled at once, the data is purged in the background"""
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request):
+        job = start_account_deletion(request.user)
+        return Response(
+            {
+                "detail": "Konto wird gelöscht.",
+                "job_id": job.id,
+                "status": job.status,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
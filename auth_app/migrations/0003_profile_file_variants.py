@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_profile_created_at_profile_description_profile_file_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='file_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,13 +1,15 @@
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils import timezone
+from core.utils.tracking import ChangeTrackingMixin
 
-class Profile(models.Model):
+class Profile(ChangeTrackingMixin, models.Model):
     """Defines user profile model"""
     TYPE_CHOICES = (('customer', 'Customer'), ('business', 'Business'))
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     file = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    file_variants = models.JSONField(default=dict, blank=True, editable=False)
     location = models.CharField(max_length=255, blank=True, null=True)
     tel = models.CharField(max_length=50, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
@@ -15,4 +17,25 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f'{self.user.username} ({self.type})'
\ No newline at end of file
+        return f'{self.user.username} ({self.type})'
+
+class AccountDeletionJob(models.Model):
+    """Defines the background purge of a deleted account, progress holds deleted rows per step"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+        ('done', 'Done'),
+    )
+    account_id = models.IntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    stage = models.CharField(max_length=30, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'Deletion of {self.username} (#{self.account_id}): {self.status}'
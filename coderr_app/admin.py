@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.db.models import Min
 from django.utils.html import format_html
-from coderr_app.models import Offer, OfferDetail, Order, Review
+from coderr_app.models import ArchivedOrder, BusinessDailyStats, Offer, OfferDetail, Order, Review
 
 
 class OfferDetailInline(admin.TabularInline):
@@ -139,8 +139,38 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'customer_user', 'business_user', 'status', 'created_at')
     list_filter = ('status', 'offer_type', 'created_at')
     search_fields = ('title', 'customer_user__username', 'business_user__username')
-    
-    
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Shows archived orders read-only, rows are moved here by archive_orders"""
+    list_display = ('id', 'title', 'customer_user', 'business_user', 'status', 'created_at', 'archived_at')
+    list_filter = ('status', 'archived_at')
+    search_fields = ('title', 'customer_user__username', 'business_user__username')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BusinessDailyStats)
+class BusinessDailyStatsAdmin(admin.ModelAdmin):
+    """Shows the daily rollups read-only, they are maintained by signals and rebuild_rollups"""
+    list_display = ('day', 'business_user', 'order_count', 'completed_count', 'cancelled_count', 'completed_revenue')
+    list_select_related = ('business_user',)
+    list_filter = ('day',)
+    search_fields = ('business_user__username',)
+    ordering = ('-day',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     """Provides Admin columns for Reviews"""
@@ -0,0 +1,181 @@
+"""Provides async-native variants of the hottest read endpoints and the order event stream for the ASGI deployment"""
+import json
+import time
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from auth_app.models import Profile
+from core.utils.async_api import async_api_view
+from core.utils.events import get_event_backend, user_channel
+from core.utils.throttling import AnonThrottle, UserThrottle
+from coderr_app.api.pagination import OfferPageNumberPagination
+from coderr_app.api.serializers import OfferListSerializer, OfferRetrieveSerializer
+from coderr_app.models import ArchivedOrder, Offer, Order, Review
+from coderr_app.queries.offer_filters import build_offer_queryset, build_offer_retrieve_queryset
+from coderr_app.queries.offer_views import record_offer_view
+from coderr_app.queries.order_archive import include_archived_requested
+
+
+def _page_size(params):
+    """Mirrors OfferPageNumberPagination.get_page_size for plain Django requests"""
+    pagination = OfferPageNumberPagination
+    value = params.get(pagination.page_size_query_param)
+    if value and value.isdigit() and int(value) > 0:
+        return min(int(value), pagination.max_page_size)
+    return pagination.page_size
+
+
+def _page_number(params, count, page_size):
+    """Validates the requested page like Django's Paginator does for the sync view"""
+    value = params.get(OfferPageNumberPagination.page_query_param) or '1'
+    num_pages = max(1, -(-count // page_size))
+    if value in OfferPageNumberPagination.last_page_strings:
+        return num_pages
+    if not value.isdigit() or not 1 <= int(value) <= num_pages:
+        raise NotFound('Invalid page.')
+    return int(value)
+
+
+def _page_links(request, page, count, page_size):
+    """Builds next/previous links in the same shape as PageNumberPagination"""
+    url = request.build_absolute_uri()
+    param = OfferPageNumberPagination.page_query_param
+    next_link = replace_query_param(url, param, page + 1) if page * page_size < count else None
+    if page <= 1:
+        previous_link = None
+    elif page == 2:
+        previous_link = remove_query_param(url, param)
+    else:
+        previous_link = replace_query_param(url, param, page - 1)
+    return next_link, previous_link
+
+
+async def _business_profile_exists(business_user_id):
+    """Checks user existence and business type with a single query"""
+    return await Profile.objects.filter(user_id=business_user_id, type='business').aexists()
+
+
+@async_api_view(throttle_scope='offers', throttle_classes=(AnonThrottle, UserThrottle), load_priority='low')
+async def offer_list(request):
+    """Async variant of OfferListCreateView GET with identical filters and pagination"""
+    fields = OfferListSerializer.requested_fields(request)
+    expand = 'details' in OfferListSerializer.requested_expansions(request)
+    qs = OfferListSerializer.narrow_queryset(build_offer_queryset(request, fields, expand), fields)
+    page_size = _page_size(request.GET)
+    count = await qs.acount()
+    page = _page_number(request.GET, count, page_size)
+    start = (page - 1) * page_size
+    offers = [offer async for offer in qs[start:start + page_size].aiterator(chunk_size=page_size)]
+    next_link, previous_link = _page_links(request, page, count, page_size)
+    return {
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': OfferListSerializer(offers, many=True, context={'request': request}).data,
+    }
+
+
+@async_api_view(authenticated=True)
+async def offer_retrieve(request, pk):
+    """Async variant of OfferRetrieveView GET"""
+    expand = 'details' in OfferRetrieveSerializer.requested_expansions(request)
+    offer = await build_offer_retrieve_queryset(expand).filter(pk=pk).afirst()
+    if offer is None:
+        raise NotFound('No Offer matches the given query.')
+    record_offer_view(offer.pk)
+    return OfferRetrieveSerializer(offer, context={'request': request}).data
+
+
+@async_api_view(throttle_scope='base-info', throttle_classes=(AnonThrottle, UserThrottle), load_priority='low')
+async def base_info(request):
+    """Async variant of BaseInfoView"""
+    agg = await Review.objects.aaggregate(review_count=Count('id'), avg_rating=Avg('rating'))
+    review_count = agg['review_count'] or 0
+    avg_raw = agg['avg_rating'] or 0
+    return {
+        'review_count': review_count,
+        'average_rating': round(float(avg_raw), 1) if review_count > 0 else 0.0,
+        'business_profile_count': await Profile.objects.filter(type='business').acount(),
+        'offer_count': await Offer.objects.acount(),
+    }
+
+
+@async_api_view(authenticated=True)
+async def order_in_progress_count(request, business_user_id):
+    """Async variant of OrderInProgressCountView"""
+    if not await _business_profile_exists(business_user_id):
+        raise NotFound('Kein Geschäftsnutzer mit dieser ID gefunden.')
+    count = await Order.objects.filter(business_user_id=business_user_id, status='in_progress').acount()
+    return {'order_count': count}
+
+
+@async_api_view(authenticated=True)
+async def completed_order_count(request, business_user_id):
+    """Async variant of CompletedOrderCountView"""
+    if not await _business_profile_exists(business_user_id):
+        raise NotFound('Kein Geschäftsnutzer mit dieser ID gefunden.')
+    count = await Order.objects.filter(business_user_id=business_user_id, status='completed').acount()
+    if include_archived_requested(request.GET):
+        count += await ArchivedOrder.objects.filter(business_user_id=business_user_id, status='completed').acount()
+    return {'completed_order_count': count}
+
+
+def _sse_message(event_type, data, event_id=None):
+    """Formats one server-sent event frame"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event_type}', f'data: {json.dumps(data, cls=DjangoJSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _order_counts(user_id):
+    """Initial counts for business dashboards, so they need no extra poll after connecting"""
+    if not await _business_profile_exists(user_id):
+        return None
+    orders = Order.objects.filter(business_user_id=user_id)
+    return {
+        'order_count': await orders.filter(status='in_progress').acount(),
+        'completed_order_count': await orders.filter(status='completed').acount(),
+    }
+
+
+async def _event_stream(subscription, snapshot):
+    """Yields the snapshot, then events and heartbeats until the client leaves or the max duration is reached"""
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    deadline = time.monotonic() + getattr(settings, 'SSE_MAX_SECONDS', 300)
+    try:
+        yield f'retry: {getattr(settings, "SSE_RETRY_MS", 3000)}\n\n'
+        yield _sse_message('ready', snapshot)
+        while time.monotonic() < deadline:
+            event = await subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield _sse_message(event['type'], event['data'], event['id'])
+    finally:
+        subscription.close()
+
+
+@async_api_view(authenticated=True, query_ticket=True)
+async def order_events(request):
+    """Pushes order.created and order.status_changed events of the user as text/event-stream (ASGI only, ?ticket= auth)"""
+    if not isinstance(request, ASGIRequest):
+        exc = APIException('Event-Stream ist nur über ASGI verfügbar.')
+        exc.status_code = status.HTTP_501_NOT_IMPLEMENTED
+        raise exc
+    subscription = get_event_backend().subscribe(
+        user_channel(request.user.id), maxsize=getattr(settings, 'SSE_QUEUE_SIZE', 100),
+    )
+    try:
+        snapshot = {'user': request.user.id, 'counts': await _order_counts(request.user.id)}
+    except Exception:
+        subscription.close()
+        raise
+    response = StreamingHttpResponse(_event_stream(subscription, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
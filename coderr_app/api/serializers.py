@@ -1,11 +1,104 @@
+from urllib.parse import urlsplit
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
 from auth_app.models import Profile
 import os
+from core.utils.retry import retry_on_contention
+from core.utils.tracking import assign_changed
 from coderr_app.models import Offer, OfferDetail, Order, Review
+from coderr_app.queries.offer_services import build_offer_details
+from coderr_app.queries.order_services import publish_order_event
 
 User = get_user_model()
 
+
+def _variant_urls(serializer, stored):
+    """Turns stored variant paths into (absolute) media URLs"""
+    request = serializer.context.get('request')
+    urls = {}
+    for name, formats in ((stored or {}).get('variants') or {}).items():
+        urls[name] = {}
+        for fmt, path in formats.items():
+            url = default_storage.url(path)
+            urls[name][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def _split_param(value):
+    """Splits a comma separated query param into clean names"""
+    return [v.strip() for v in (value or '').split(',') if v.strip()]
+
+
+class SparseFieldsetMixin:
+    """Restricts list output to ?fields= / ?omit= and tells the view which columns, joins and prefetches are needed"""
+    sparse_sources = {}
+    sparse_prefetches = {}
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Returns the selected field names in declaration order, None when the request does not narrow"""
+        if request is None or request.method != 'GET':
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        fields, omit = _split_param(params.get('fields')), _split_param(params.get('omit'))
+        if not fields and not omit:
+            return None
+        unknown = (set(fields) | set(omit)) - set(cls.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unbekannte Felder: {", ".join(sorted(unknown))}'})
+        return [f for f in cls.Meta.fields if (not fields or f in fields) and f not in omit]
+
+    @classmethod
+    def narrow_queryset(cls, queryset, fields):
+        """Defers unneeded columns and drops joins and prefetches that no selected field uses"""
+        if fields is None:
+            return queryset
+        columns = set()
+        for name in fields:
+            columns.update(cls.sparse_sources.get(name, (name,)))
+        relations = sorted({c.split('__')[0] for c in columns if '__' in c})
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        if cls.sparse_prefetches:
+            prefetches = [cls.sparse_prefetches[name] for name in fields if name in cls.sparse_prefetches]
+            queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+        return queryset.only(*columns) if columns else queryset.only('pk')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.requested_fields(self.context.get('request'))
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class ExpandableFieldsMixin:
+    """Inlines nested representations for ?expand=<field> instead of ids and links"""
+    expandable_fields = {}
+
+    @classmethod
+    def requested_expansions(cls, request):
+        """Returns the validated set of fields to expand for GET requests"""
+        if request is None or request.method != 'GET':
+            return set()
+        params = getattr(request, 'query_params', request.GET)
+        names = set(_split_param(params.get('expand')))
+        unknown = names - set(cls.expandable_fields)
+        if unknown:
+            raise serializers.ValidationError({'expand': f'Nicht erweiterbar: {", ".join(sorted(unknown))}'})
+        return names
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.requested_expansions(self.context.get('request')):
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](many=True, read_only=True)
+
+
 class ProfileDetailSerializer(serializers.ModelSerializer):
     """Serializes profile detail data"""
     user = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -14,11 +107,12 @@ class ProfileDetailSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source='user.first_name', required=False, allow_blank=True)
     last_name = serializers.CharField(source='user.last_name', required=False, allow_blank=True)
     file = serializers.SerializerMethodField()
+    file_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
         fields = (
-            'user', 'username', 'first_name', 'last_name', 'file',
+            'user', 'username', 'first_name', 'last_name', 'file', 'file_variants',
             'location', 'tel', 'description', 'working_hours',
             'type', 'email', 'created_at',
         )
@@ -32,6 +126,9 @@ class ProfileDetailSerializer(serializers.ModelSerializer):
     def get_username(self, obj):
         return obj.user.username if getattr(obj, 'user', None) and obj.user.username else ''
 
+    def get_file_variants(self, obj):
+        return _variant_urls(self, obj.file_variants)
+
     def get_file(self, obj):
         if not obj.file:
             return ''
@@ -57,30 +154,35 @@ class ProfileDetailSerializer(serializers.ModelSerializer):
                 setattr(instance, field, validated_data[field])
 
         if user_data:
-            if 'first_name' in user_data:
-                instance.user.first_name = user_data['first_name'] or ''
-            if 'last_name' in user_data:
-                instance.user.last_name = user_data['last_name'] or ''
+            values = {f: user_data[f] or '' for f in ('first_name', 'last_name') if f in user_data}
             if 'email' in user_data:
-                instance.user.email = user_data['email']
-            instance.user.save()
+                values['email'] = user_data['email']
+            user_changed = assign_changed(instance.user, values)
+            if user_changed:
+                instance.user.save(update_fields=user_changed)
 
         instance.save()
         return instance
 
 
-class ProfileListSerializer(serializers.ModelSerializer):
+class ProfileListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes profile list data"""
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     username = serializers.SerializerMethodField()           
     first_name = serializers.CharField(source='user.first_name', required=False, allow_blank=True)
     last_name = serializers.CharField(source='user.last_name', required=False, allow_blank=True)  
     file = serializers.SerializerMethodField()               
+    file_variants = serializers.SerializerMethodField()
+    sparse_sources = {
+        'username': ('user', 'user__username'),
+        'first_name': ('user', 'user__first_name'),
+        'last_name': ('user', 'user__last_name'),
+    }
 
     class Meta:
         model = Profile
         fields = (
-            'user', 'username', 'first_name', 'last_name', 'file',
+            'user', 'username', 'first_name', 'last_name', 'file', 'file_variants',
             'location', 'tel', 'description', 'working_hours',
             'type',
         )
@@ -94,6 +196,9 @@ class ProfileListSerializer(serializers.ModelSerializer):
     def get_username(self, obj):
         return obj.user.username if getattr(obj, 'user', None) else ''
 
+    def get_file_variants(self, obj):
+        return _variant_urls(self, obj.file_variants)
+
     def get_file(self, obj):
         if not obj.file:
             return ''                                                 
@@ -105,7 +210,7 @@ class ProfileListSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)                    
         for key in ['first_name', 'last_name', 'location', 'tel', 'description', 'working_hours']:
-            if data.get(key) is None:
+            if key in data and data[key] is None:
                 data[key] = ''
         return data
     
@@ -122,23 +227,51 @@ class OfferDetailMiniSerializer(serializers.ModelSerializer):
         return f'/offerdetails/{obj.pk}/'
 
 
-class OfferListSerializer(serializers.ModelSerializer):
+class OfferDetailFullSerializer(serializers.ModelSerializer):
+    """Serializes complete offer detail data"""
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OfferDetail
+        fields = (
+            'id',
+            'title',
+            'revisions',
+            'delivery_time_in_days',
+            'price',
+            'features',
+            'offer_type',
+        )
+
+
+class OfferListSerializer(SparseFieldsetMixin, ExpandableFieldsMixin, serializers.ModelSerializer):
     """Serializes offer list data"""
     details = OfferDetailMiniSerializer(many=True, read_only=True)
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     min_delivery_time = serializers.IntegerField(read_only=True)
     user_details = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    sparse_sources = {
+        'details': (),
+        'min_price': (),
+        'min_delivery_time': (),
+        'user_details': ('user', 'user__first_name', 'user__last_name', 'user__username'),
+    }
+    expandable_fields = {'details': OfferDetailFullSerializer}
 
     class Meta:
         model = Offer
         fields = (
-            'id', 'user', 'title', 'image', 'description',
+            'id', 'user', 'title', 'image', 'image_variants', 'description',
             'created_at', 'updated_at',
             'details',
             'min_price', 'min_delivery_time',
             'user_details',
         )
 
+    def get_image_variants(self, obj):
+        return _variant_urls(self, obj.image_variants)
+
     def get_user_details(self, obj):
         u = getattr(obj, 'user', None)
         return {
@@ -195,29 +328,27 @@ class OfferCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Die 3 Details müssen basic, standard und premium enthalten (jeweils einmal).')
         return value
 
+    @retry_on_contention('offer_create')
     def create(self, validated_data):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
-        details_data = validated_data.pop('details')
-        offer = Offer.objects.create(user=user, **validated_data)
-        objs = []
-        for d in details_data:
-            dt_days = d.get('delivery_time_in_days')
-            objs.append(OfferDetail(
-                offer=offer,
-                title=d.get('title'),
-                revisions=d.get('revisions', 0),
-                delivery_time_in_days=dt_days,
-                delivery_time=dt_days,          
-                price=d.get('price'),
-                features=d.get('features', []),
-                offer_type=d.get('offer_type'),
-            ))
-        OfferDetail.objects.bulk_create(objs)
-        offer.refresh_from_db()
+        details_data = validated_data['details']
+        offer = Offer.objects.create(user=user, **{k: v for k, v in validated_data.items() if k != 'details'})
+        OfferDetail.objects.bulk_create(build_offer_details(offer, details_data))
         return offer
     
   
+class OfferBulkCreateSerializer(serializers.Serializer):
+    """Serializes the envelope of a bulk offer import, items are validated one by one later"""
+    offers = serializers.ListField(child=serializers.JSONField(), allow_empty=False)
+
+    def validate_offers(self, value):
+        limit = getattr(settings, 'OFFER_BULK_MAX_ITEMS', 500)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Maximal {limit} Angebote pro Import.')
+        return value
+    
+  
 class OfferDetailMiniAbsSerializer(serializers.ModelSerializer):
     """Serializes basic offer detail data"""
     url = serializers.SerializerMethodField()
@@ -232,20 +363,25 @@ class OfferDetailMiniAbsSerializer(serializers.ModelSerializer):
         return request.build_absolute_uri(path) if request else path
 
 
-class OfferRetrieveSerializer(serializers.ModelSerializer):           
+class OfferRetrieveSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):           
     """Serializes offer data for retrieving"""
     details = OfferDetailMiniAbsSerializer(many=True, read_only=True)
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     min_delivery_time = serializers.IntegerField(read_only=True)
+    image_variants = serializers.SerializerMethodField()
+    expandable_fields = {'details': OfferDetailFullSerializer}
 
     class Meta:
         model = Offer                                            
         fields = (
-            'id', 'user', 'title', 'image', 'description',
+            'id', 'user', 'title', 'image', 'image_variants', 'description',
             'created_at', 'updated_at',
             'details', 'min_price', 'min_delivery_time',
         )
 
+    def get_image_variants(self, obj):
+        return _variant_urls(self, obj.image_variants)
+
 
 class OfferDetailRetrieveSerializer(serializers.ModelSerializer):
     """Serializes offer detail data for retrieving"""
@@ -264,23 +400,6 @@ class OfferDetailRetrieveSerializer(serializers.ModelSerializer):
         )
         
 
-class OfferDetailFullSerializer(serializers.ModelSerializer):
-    """Serializes complete offer detail data"""
-    price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-
-    class Meta:
-        model = OfferDetail
-        fields = (
-            'id',
-            'title',
-            'revisions',
-            'delivery_time_in_days',
-            'price',
-            'features',
-            'offer_type',
-        )
-
-
 class OfferDetailUpdateSerializer(serializers.ModelSerializer):
     """Serializes offer detail data for updating"""
     offer_type = serializers.ChoiceField(choices=('basic', 'standard', 'premium'), required=True)
@@ -326,13 +445,16 @@ class OfferUpdateSerializer(serializers.ModelSerializer):
             'description': {'required': False, 'allow_blank': True},
         }
 
+    @retry_on_contention('offer_update')
     def update(self, instance, validated_data):
-        details_data = validated_data.pop('details', None)
-        for f in ('title', 'image', 'description'):
-            if f in validated_data:
-                setattr(instance, f, validated_data[f])
-        instance.save()
+        """Runs again on contention, so validated_data stays untouched and details are marked clean only after commit"""
+        details_data = validated_data.get('details')
+        for field in ('title', 'image', 'description'):
+            if field in validated_data:
+                setattr(instance, field, validated_data[field])
+        offer_changed = instance.changed_fields()
 
+        changed_details, detail_fields = [], set()
         if details_data:
             existing_by_type = {d.offer_type: d for d in instance.details.all()}
             allowed_types = {'basic', 'standard', 'premium'}
@@ -349,15 +471,22 @@ class OfferUpdateSerializer(serializers.ModelSerializer):
                 if 'id' in item and item['id'] is not None and item['id'] != detail.id:
                     raise serializers.ValidationError({'details': f'ID {item["id"]} passt nicht zum offer_type="{offer_type}" (erwartet {detail.id}).'})
 
-                for f in ('title', 'revisions', 'delivery_time_in_days', 'price', 'features'):
-                    if f in item:
-                        setattr(detail, f, item[f])
-
-                if 'delivery_time_in_days' in item and item['delivery_time_in_days'] is not None:
-                    detail.delivery_time = item['delivery_time_in_days']
-
-                detail.save()
-
+                values = {f: item[f] for f in ('title', 'revisions', 'delivery_time_in_days', 'price', 'features') if f in item}
+                if item.get('delivery_time_in_days') is not None:
+                    values['delivery_time'] = item['delivery_time_in_days']
+
+                for field, value in values.items():
+                    setattr(detail, field, value)
+                changed = detail.changed_fields()
+                if changed and detail not in changed_details:
+                    changed_details.append(detail)
+                detail_fields.update(changed)
+
+        if changed_details:
+            OfferDetail.objects.bulk_update(changed_details, sorted(detail_fields))
+            transaction.on_commit(lambda: [detail.mark_clean() for detail in changed_details])
+        if offer_changed or changed_details:
+            instance.save(update_fields=[*offer_changed, 'updated_at'])
         return instance
 
 
@@ -376,7 +505,7 @@ class OfferPatchResponseSerializer(serializers.ModelSerializer):
         )
         
         
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes order list data"""
     customer_user = serializers.PrimaryKeyRelatedField(read_only=True)
     business_user = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -418,13 +547,42 @@ class OrderStatusPatchSerializer(serializers.Serializer):
             raise serializers.ValidationError('Nur das Feld "status" darf aktualisiert werden.')
         return attrs
     
+    @retry_on_contention('order_status_update')
     def update(self, instance, validated_data):
+        previous_status = instance.initial_value('status')
         instance.status = validated_data['status']
-        instance.save(update_fields=['status', 'updated_at'])
+        instance.save()
+        if previous_status != instance.status:
+            publish_order_event('order.status_changed', instance, previous_status)
         return instance
     
 
-class ReviewListSerializer(serializers.ModelSerializer):
+class OrderBulkStatusSerializer(serializers.Serializer):
+    """Serializes a status change for many orders, same status validation as a single PATCH"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        error_messages={'empty': 'Mindestens eine Bestellung erforderlich.'}
+    )
+    status = serializers.ChoiceField(
+        choices=Order._meta.get_field('status').choices,
+        error_messages={'invalid_choice': 'Ungültiger Status.'}
+    )
+
+    def validate_ids(self, value):
+        limit = getattr(settings, 'ORDER_BULK_STATUS_MAX_IDS', 500)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Maximal {limit} Bestellungen pro Anfrage.')
+        return value
+
+    def validate(self, attrs):
+        extras = set(getattr(self, 'initial_data', {}).keys()) - {'ids', 'status'}
+        if extras:
+            raise serializers.ValidationError('Nur die Felder "ids" und "status" sind erlaubt.')
+        return attrs
+
+
+class ReviewListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializes review list data"""
     business_user = serializers.PrimaryKeyRelatedField(read_only=True)
     reviewer = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -483,6 +641,7 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @retry_on_contention('review_create')
     def create(self, validated_data):
         reviewer = self.context['request'].user
         return Review.objects.create(reviewer=reviewer, **validated_data)
@@ -508,3 +667,38 @@ class ReviewUpdateSerializer(serializers.ModelSerializer):
         if value < 1 or value > 5:
             raise serializers.ValidationError('Rating muss zwischen 1 und 5 liegen.')
         return value
+
+    @retry_on_contention('review_update')
+    def update(self, instance, validated_data):
+        return super().update(instance, validated_data)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Serializes one sub-request of a batch"""
+    method = serializers.ChoiceField(choices=('GET', 'POST', 'PATCH', 'DELETE'), default='GET')
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError('Pfad muss mit /api/ beginnen.')
+        if urlsplit(value).path.rstrip('/') == '/api/batch':
+            raise serializers.ValidationError('Batches dürfen nicht verschachtelt werden.')
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """Serializes a batch of sub-requests, writes only with explicit opt-in"""
+    requests = BatchItemSerializer(many=True)
+    allow_writes = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        items = attrs['requests']
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if not items:
+            raise serializers.ValidationError({'requests': 'Mindestens eine Anfrage erforderlich.'})
+        if len(items) > limit:
+            raise serializers.ValidationError({'requests': f'Maximal {limit} Anfragen pro Batch.'})
+        if not attrs['allow_writes'] and any(item['method'] != 'GET' for item in items):
+            raise serializers.ValidationError({'allow_writes': 'Schreibende Anfragen erfordern allow_writes=true.'})
+        return attrs
@@ -5,17 +5,26 @@ from coderr_app.api.views import (
     BusinessProfileListView,
     CustomerProfileListView,
     OfferListCreateView,
+    OfferBulkCreateView,
     OfferRetrieveView,
     OfferDetailRetrieveView,
+    OfferSimilarView,
+    OfferAutocompleteView,
     OrderListView,
     OrderListCreateView,
     OrderStatusUpdateView,
+    OrderBulkStatusView,
+    OrderExportView,
+    BusinessDashboardView,
     OrderInProgressCountView,
     CompletedOrderCountView,
     ReviewListView,
     ReviewDetailView,
     BaseInfoView,
+    BatchView,
+    StreamTicketView,
 )
+from coderr_app.api import async_views
 
 
 urlpatterns = [
@@ -23,13 +32,27 @@ urlpatterns = [
     path('profiles/business/', BusinessProfileListView.as_view(), name='profiles-business'),
     path('profiles/customer/', CustomerProfileListView.as_view(), name='profiles-customer'),
     path('offers/', OfferListCreateView.as_view(), name='offers-list-create'),
+    path('offers/autocomplete/', OfferAutocompleteView.as_view(), name='offers-autocomplete'),
+    path('offers/bulk/', OfferBulkCreateView.as_view(), name='offers-bulk-create'),
     path('offers/<int:pk>/', OfferRetrieveView.as_view(), name='offers-detail'),
+    path('offers/<int:pk>/similar/', OfferSimilarView.as_view(), name='offers-similar'),
     path('offerdetails/<int:pk>/', OfferDetailRetrieveView.as_view(), name='offerdetails-detail'),
     path('orders/', OrderListCreateView.as_view(), name='orders-list-create'),
+    path('orders/bulk-status/', OrderBulkStatusView.as_view(), name='orders-bulk-status'),
+    path('orders/export/', OrderExportView.as_view(), name='orders-export'),
     path('orders/<int:pk>/', OrderStatusUpdateView.as_view(), name='orders-status-update'),
     path('order-count/<int:business_user_id>/', OrderInProgressCountView.as_view(), name='orders-in-progress-count'),
     path('completed-order-count/<int:business_user_id>/', CompletedOrderCountView.as_view(), name='orders-completed-count'),
     path('reviews/', ReviewListView.as_view(), name='reviews-list'),
     path('reviews/<int:pk>/', ReviewDetailView.as_view(), name='reviews-detail'),
+    path('dashboard/', BusinessDashboardView.as_view(), name='business-dashboard'),
     path('base-info/', BaseInfoView.as_view(), name='base-info'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('async/offers/', async_views.offer_list, name='async-offers-list'),
+    path('async/offers/<int:pk>/', async_views.offer_retrieve, name='async-offers-detail'),
+    path('async/order-count/<int:business_user_id>/', async_views.order_in_progress_count, name='async-orders-in-progress-count'),
+    path('async/completed-order-count/<int:business_user_id>/', async_views.completed_order_count, name='async-orders-completed-count'),
+    path('async/base-info/', async_views.base_info, name='async-base-info'),
+    path('events/ticket/', StreamTicketView.as_view(), name='order-events-ticket'),
+    path('events/orders/', async_views.order_events, name='order-events'),
 ]
\ No newline at end of file
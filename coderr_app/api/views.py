@@ -1,4 +1,9 @@
+import datetime
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.db.models import Min, Q, Case, When, F, IntegerField, Avg, Count
 from rest_framework.views import APIView
 from rest_framework.generics import (
@@ -13,11 +18,16 @@ from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework import status
-from core.utils.permissions import IsOwnerOrReadOnly, IsBusinessUser, IsCustomerUser
-from core.utils.query import parse_int_param
+from core.utils.permissions import IsOwnerOrReadOnly, IsBusinessUser, IsCustomerUser, get_profile
+from core.utils.query import parse_date_param, parse_int_param
+from core.utils.async_api import issue_stream_ticket
+from core.utils.db_router import release_to_replicas
+from core.utils.uploads import LimitedUploadMixin
+from core.utils.idempotency import IdempotentCreateMixin
+from core.utils.throttling import AnonThrottle, UserThrottle
 from auth_app.models import Profile
 from coderr_app.api.serializers import ProfileDetailSerializer, ProfileListSerializer, ReviewListSerializer
-from coderr_app.models import Offer, OfferDetail, Order, Review
+from coderr_app.models import ArchivedOrder, Offer, OfferDetail, Order, Review
 from coderr_app.api.serializers import (
     OfferListSerializer, 
     OfferCreateSerializer, 
@@ -28,21 +38,38 @@ from coderr_app.api.serializers import (
     OrderListSerializer,
     OrderCreateInputSerializer,
     OrderStatusPatchSerializer,
+    OrderBulkStatusSerializer,
     ReviewCreateSerializer,
     ReviewUpdateSerializer,
+    BatchRequestSerializer,
+    OfferBulkCreateSerializer,
 )
 from coderr_app.api.pagination import OfferPageNumberPagination
-from coderr_app.queries.offer_filters import build_offer_queryset
-from coderr_app.queries.order_services import build_order_queryset, create_order_from_offer_detail
+from coderr_app.queries.offer_filters import build_offer_queryset, build_offer_retrieve_queryset
+from coderr_app.queries.order_services import (
+    build_archived_order_queryset,
+    build_order_queryset,
+    bulk_update_order_status,
+    create_order_from_offer_detail,
+)
+from coderr_app.queries.order_archive import include_archived_requested, with_archived
+from coderr_app.queries.batch_services import dispatch_batch
+from coderr_app.queries.offer_import import import_offers
+from coderr_app.queries.offer_views import record_offer_view
+from coderr_app.queries.similarity_services import neighbours_per_offer, similar_offer_ids
+from coderr_app.queries.autocomplete_services import get_autocomplete_index
+from coderr_app.queries.rollup_services import DASHBOARD_DEFAULT_DAYS, DASHBOARD_INTERVALS, dashboard_series
+from coderr_app.queries.order_export import EXPORT_FORMATS, aiter_export, build_export_queryset, iter_export
 
 
-class ProfileDetailView(RetrieveUpdateAPIView):
+class ProfileDetailView(LimitedUploadMixin, RetrieveUpdateAPIView):
     """Retrieves or updates the authenticated user's profile identified by user-id, rejects access if the requesting user is not the owner."""
     serializer_class = ProfileDetailSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     queryset = Profile.objects.select_related('user').all()
     lookup_field = 'user_id'
     lookup_url_kwarg = 'pk'
+    upload_limit = 'profile_file'
     
     def perform_update(self, serializer):         
         profile = self.get_object()               
@@ -57,18 +84,30 @@ class BusinessProfileListView(ListAPIView):
     permission_classes = [IsAuthenticated]                       
     queryset = Profile.objects.select_related('user').filter(type='business')
 
+    def get_queryset(self):
+        fields = ProfileListSerializer.requested_fields(self.request)
+        return ProfileListSerializer.narrow_queryset(super().get_queryset(), fields)
+
 
 class CustomerProfileListView(ListAPIView):                   
     """'List customer profiles with optional filtering, read-only endpoint for administration"""
     serializer_class = ProfileListSerializer                  
     permission_classes = [IsAuthenticated]                    
     queryset = Profile.objects.select_related('user').filter(type='customer')
+
+    def get_queryset(self):
+        fields = ProfileListSerializer.requested_fields(self.request)
+        return ProfileListSerializer.narrow_queryset(super().get_queryset(), fields)
     
     
-class OfferListCreateView(ListCreateAPIView):
+class OfferListCreateView(LimitedUploadMixin, IdempotentCreateMixin, ListCreateAPIView):
     """Lists all offers or creates a new one as a business user, applies validation and ownership on creation"""
     parser_classes = (JSONParser, MultiPartParser, FormParser)
+    upload_limit = 'offer_image'
     pagination_class = OfferPageNumberPagination
+    throttle_classes = [AnonThrottle, UserThrottle]
+    throttle_scope = 'offers'
+    load_priority = {'GET': 'low', 'POST': 'normal'}
 
     def get_permissions(self):
         return [IsAuthenticated(), IsBusinessUser()] if self.request.method == 'POST' else [AllowAny()]
@@ -77,9 +116,26 @@ class OfferListCreateView(ListCreateAPIView):
         return OfferCreateSerializer if self.request.method == 'POST' else OfferListSerializer
 
     def get_queryset(self):
-        return build_offer_queryset(self.request)
+        fields = OfferListSerializer.requested_fields(self.request)
+        expand = 'details' in OfferListSerializer.requested_expansions(self.request)
+        return OfferListSerializer.narrow_queryset(build_offer_queryset(self.request, fields, expand), fields)
     
 
+class OfferBulkCreateView(APIView):
+    """Imports many offers for the current business user in one transaction, reports errors per item"""
+    permission_classes = [IsAuthenticated, IsBusinessUser]
+    parser_classes = (JSONParser,)
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {'offers': request.data}
+        envelope = OfferBulkCreateSerializer(data=data)
+        envelope.is_valid(raise_exception=True)
+        results = import_offers(request.user, envelope.validated_data['offers'], {'request': request})
+        created = sum(1 for r in results if r['status'] == 'created')
+        body = {'created': created, 'failed': len(results) - created, 'results': results}
+        return Response(body, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+
 class OfferRetrieveView(RetrieveAPIView):
     """'Returns a single offer by ID, read-only access for viewing offer basics"""
     permission_classes = [IsAuthenticated]
@@ -103,40 +159,69 @@ class OfferRetrieveView(RetrieveAPIView):
         )
         
 
+class OfferSimilarView(APIView):
+    """Returns the precomputed similar offers of an offer, ordered by similarity"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        limit = min(parse_int_param(request.query_params, 'limit') or neighbours_per_offer(), neighbours_per_offer())
+        neighbours = similar_offer_ids(pk, limit)
+        if not neighbours and not Offer.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Angebot nicht gefunden.'}, status=status.HTTP_404_NOT_FOUND)
+        offers = build_offer_retrieve_queryset().in_bulk([offer_id for offer_id, _score in neighbours])
+        results = []
+        for offer_id, score in neighbours:
+            if offer_id in offers:
+                data = OfferListSerializer(offers[offer_id], context={'request': request}).data
+                results.append({**data, 'score': score})
+        return Response({'offer': pk, 'results': results}, status=status.HTTP_200_OK)
+
+
+class OfferAutocompleteView(APIView):
+    """Suggests offer titles for a prefix from the in-memory index, no database query per keystroke"""
+    permission_classes = [AllowAny]
+    load_priority = 'low'
+
+    def get(self, request):
+        default_limit = getattr(settings, 'AUTOCOMPLETE_LIMIT', 10)
+        limit = min(parse_int_param(request.query_params, 'limit') or default_limit, getattr(settings, 'AUTOCOMPLETE_MAX_LIMIT', 25))
+        query = request.query_params.get('q', '')
+        results = get_autocomplete_index().search(query, limit) if query.strip() else []
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
 class OfferDetailRetrieveView(RetrieveAPIView):        
     """Returns an offer with its details"""
     permission_classes = [IsAuthenticated]             
     serializer_class = OfferDetailRetrieveSerializer   
     queryset = OfferDetail.objects.all()               
+
+    def retrieve(self, request, *args, **kwargs):
+        detail = self.get_object()
+        record_offer_view(detail.offer_id)
+        return Response(self.get_serializer(detail).data)
     
     
-class OfferRetrieveView(RetrieveUpdateDestroyAPIView):
+class OfferRetrieveView(LimitedUploadMixin, RetrieveUpdateDestroyAPIView):
     """Returns a single offer by ID, read-only access for viewing offer basic info"""
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     serializer_class = OfferRetrieveSerializer
+    upload_limit = 'offer_image'
 
     def get_queryset(self):                        
-        return (
-            Offer.objects
-            .select_related('user')
-            .prefetch_related('details')
-            .annotate(
-                min_delivery_time=Min(
-                    Case(
-                        When(details__delivery_time_in_days__isnull=False, then=F('details__delivery_time_in_days')),
-                        default=F('details__delivery_time'),
-                        output_field=IntegerField(),
-                    )
-                ),
-                min_price=Min('details__price'),
-            )
-        )
+        expand = self.request.method != 'GET' or 'details' in OfferRetrieveSerializer.requested_expansions(self.request)
+        return build_offer_retrieve_queryset(expand)
 
     def get_serializer_class(self):                        
         if self.request.method in ('PATCH', 'PUT'):
             return OfferUpdateSerializer                   
         return OfferRetrieveSerializer                     
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        record_offer_view(response.data['id'])
+        return response
+
     def patch(self, request, *args, **kwargs):             
         offer = self.get_object()                          
         serializer = self.get_serializer(offer, data=request.data, partial=True)
@@ -162,16 +247,21 @@ class OrderListView(ListAPIView):
         return qs
     
 
-class OrderListCreateView(ListCreateAPIView):
+class OrderListCreateView(IdempotentCreateMixin, ListCreateAPIView):
     """Lists orders or creates a new order for the current customer"""
     permission_classes = [IsAuthenticated]
+    load_priority = {'GET': 'normal', 'POST': 'critical'}
     parser_classes = (JSONParser,)
 
     def get_serializer_class(self):
         return OrderCreateInputSerializer if self.request.method == 'POST' else OrderListSerializer
 
     def get_queryset(self):
-        return build_order_queryset(self.request)
+        fields = OrderListSerializer.requested_fields(self.request)
+        qs = OrderListSerializer.narrow_queryset(build_order_queryset(self.request), fields)
+        if include_archived_requested(self.request.query_params):
+            qs = with_archived(qs, build_archived_order_queryset(self.request), '-created_at')
+        return qs
 
     def create(self, request, *args, **kwargs):
         in_serializer = self.get_serializer(data=request.data)
@@ -185,6 +275,7 @@ class OrderStatusUpdateView(RetrieveUpdateDestroyAPIView):
     """Updates the status of an order by ID, restricted to the business owner of the order or staff member"""
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated]
+    load_priority = {'GET': 'normal', 'PATCH': 'critical', 'DELETE': 'critical'}
     lookup_field = 'pk'
     parser_classes = (JSONParser,)
 
@@ -192,7 +283,7 @@ class OrderStatusUpdateView(RetrieveUpdateDestroyAPIView):
         return OrderStatusPatchSerializer if self.request.method in ('PATCH', 'PUT') else OrderListSerializer
 
     def check_business_permissions(self, order):
-        profile = Profile.objects.filter(user=self.request.user).first()
+        profile = get_profile(self.request.user.id)
         if not profile or profile.type != 'business':
             return Response({'detail': 'Nur Business-User dürfen den Status ändern.'}, status=status.HTTP_403_FORBIDDEN)
         if order.business_user_id != self.request.user.id:
@@ -219,17 +310,65 @@ class OrderStatusUpdateView(RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
     
 
+class OrderBulkStatusView(APIView):
+    """Changes the status of many orders of the business user at once, with a result per order id"""
+    permission_classes = [IsAuthenticated]
+    load_priority = 'critical'
+    parser_classes = (JSONParser,)
+
+    def patch(self, request):
+        profile = get_profile(request.user.id)
+        if not profile or profile.type != 'business':
+            return Response({'detail': 'Nur Business-User dürfen den Status ändern.'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = OrderBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        results = bulk_update_order_status(request.user, serializer.validated_data['ids'], new_status)
+        updated = sum(1 for result in results if result['result'] == 'updated')
+        return Response({'status': new_status, 'updated': updated, 'results': results}, status=status.HTTP_200_OK)
+
+
+class OrderExportView(APIView):
+    """Streams the full order history of the business user as NDJSON or CSV with constant memory"""
+    permission_classes = [IsAuthenticated, IsBusinessUser]
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'export_format': 'Erlaubt sind ndjson oder csv.'})
+        queryset = build_export_queryset(request.user, request.query_params)
+        # Under ASGI Django would read a sync iterator completely before sending, so it gets an async one
+        stream = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(stream(queryset, export_format), content_type=EXPORT_FORMATS[export_format])
+        filename = f'orders-{timezone.localdate():%Y-%m-%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class BusinessDashboardView(APIView):
+    """Returns order and revenue time series of the business user, read from the daily rollups only"""
+    permission_classes = [IsAuthenticated, IsBusinessUser]
+
+    def get(self, request):
+        params = request.query_params
+        interval = params.get('interval', 'day')
+        if interval not in DASHBOARD_INTERVALS:
+            raise ValidationError({'interval': 'Erlaubt sind day, week oder month.'})
+        end = parse_date_param(params, 'created_to') or timezone.localdate()
+        start = parse_date_param(params, 'created_from') or end - datetime.timedelta(days=DASHBOARD_DEFAULT_DAYS - 1)
+        if start > end:
+            raise ValidationError({'created_to': 'Darf nicht vor created_from liegen.'})
+        return Response(dashboard_series(request.user.id, start, end, interval), status=status.HTTP_200_OK)
+
+
 class OrderInProgressCountView(APIView):
     """Returns the number of in-progress orders for a given business-user-id"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
-        try:
-            user = User.objects.get(pk=business_user_id)
-        except User.DoesNotExist:
-            return Response({'detail': 'Kein Geschäftsnutzer mit dieser ID gefunden.'}, status=status.HTTP_404_NOT_FOUND)
-
-        profile = Profile.objects.filter(user=user).first()
+        profile = get_profile(business_user_id)
         if not profile or profile.type != 'business':
             return Response({'detail': 'Kein Geschäftsnutzer mit dieser ID gefunden.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -239,19 +378,11 @@ class OrderInProgressCountView(APIView):
     
     
 class CompletedOrderCountView(APIView):
-    """Returns the number of completed orders for a given business-user-id"""
+    """Returns the number of completed orders for a given business-user-id, archived ones with ?include_archived=1"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
-        try:
-            user = User.objects.get(pk=business_user_id)
-        except User.DoesNotExist:
-            return Response(
-                {'detail': 'Kein Geschäftsnutzer mit dieser ID gefunden.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        profile = Profile.objects.filter(user=user).first()
+        profile = get_profile(business_user_id)
         if not profile or profile.type != 'business':
             return Response(
                 {'detail': 'Kein Geschäftsnutzer mit dieser ID gefunden.'},
@@ -262,13 +393,16 @@ class CompletedOrderCountView(APIView):
             business_user_id=business_user_id,
             status='completed'
         ).count()
+        if include_archived_requested(request.query_params):
+            count += ArchivedOrder.objects.filter(business_user_id=business_user_id, status='completed').count()
 
         return Response({'completed_order_count': count}, status=status.HTTP_200_OK)
     
     
-class ReviewListView(ListCreateAPIView):
+class ReviewListView(IdempotentCreateMixin, ListCreateAPIView):
     """Lists reviews or creates a new review as a customer"""
     permission_classes = [IsAuthenticated]
+    load_priority = {'GET': 'normal', 'POST': 'critical'}
     pagination_class = None
 
     def get_permissions(self):
@@ -299,10 +433,10 @@ class ReviewListView(ListCreateAPIView):
         else:
             qs = qs.order_by('-updated_at')
 
-        return qs
+        return ReviewListSerializer.narrow_queryset(qs, ReviewListSerializer.requested_fields(self.request))
 
     def create(self, request, *args, **kwargs):
-        profile = Profile.objects.filter(user=request.user).first()
+        profile = get_profile(request.user.id)
         if not profile or profile.type != 'customer':
             return Response({'detail': 'Nur Kunden dürfen Bewertungen erstellen.'}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -315,6 +449,7 @@ class ReviewListView(ListCreateAPIView):
 class ReviewDetailView(RetrieveUpdateDestroyAPIView):
     """Retrieves, updates, or deletes a single review by ID"""
     permission_classes = [IsAuthenticated]
+    load_priority = {'GET': 'normal', 'PATCH': 'critical', 'DELETE': 'critical'}
     queryset = Review.objects.all()
     lookup_field = 'pk'
 
@@ -348,6 +483,9 @@ class ReviewDetailView(RetrieveUpdateDestroyAPIView):
 class BaseInfoView(APIView):
     """Returns platform summary (reviews, average rating, business count, offer count) for the dashboard."""
     permission_classes = [AllowAny]
+    throttle_classes = [AnonThrottle, UserThrottle]
+    throttle_scope = 'base-info'
+    load_priority = 'low'
 
     def get(self, request):
         try:
@@ -368,4 +506,27 @@ class BaseInfoView(APIView):
             }
             return Response(data, status=status.HTTP_200_OK)
         except Exception:
-            return Response({'detail': 'Interner Serverfehler.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'detail': 'Interner Serverfehler.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchView(APIView):
+    """Runs several API requests in one round trip with shared authentication and lookups"""
+    permission_classes = [AllowAny]
+    parser_classes = (JSONParser,)
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data['allow_writes']:
+            release_to_replicas()
+        results = dispatch_batch(request, serializer.validated_data['requests'])
+        return Response({'responses': results}, status=status.HTTP_200_OK)
+
+
+class StreamTicketView(APIView):
+    """Issues a short-lived signed ticket for the order event stream, EventSource cannot send the token header"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = {'ticket': issue_stream_ticket(request.user), 'expires_in': getattr(settings, 'SSE_TICKET_MAX_AGE', 60)}
+        return Response(data, status=status.HTTP_201_CREATED, headers={'Cache-Control': 'no-store'})
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark commands, never registered as a command itself"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from auth_app.models import Profile
+from coderr_app.models import Offer, OfferDetail
+
+BENCH_PASSWORD = 'Bench!2345'
+OFFER_TYPES = (('basic', Decimal('50.00'), 7), ('standard', Decimal('100.00'), 5), ('premium', Decimal('200.00'), 3))
+
+
+@contextmanager
+def scratch_database(alias='default', verbosity=0):
+    """Runs the block against a migrated throw-away SQLite file so benchmarks never touch real data, without rate limits or load shedding"""
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    tmp_dir = tempfile.mkdtemp(prefix='coderr-bench-')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp_dir, 'bench.sqlite3')
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], THROTTLE_RATES={}, LOAD_SHEDDING={'ENABLED': False}):
+            yield connection.settings_dict['NAME']
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def create_bench_user(username, profile_type):
+    """Creates a user with profile type and token, returns (user, token key)"""
+    user = User.objects.create_user(username=username, email=f'{username}@bench.local', password=BENCH_PASSWORD)
+    Profile.objects.filter(user=user).update(type=profile_type)
+    token, _ = Token.objects.get_or_create(user=user)
+    return user, token.key
+
+
+def seed_marketplace(offers=50, customers=10):
+    """Creates one business user with offers and a few customers, returns ids and tokens"""
+    business, business_token = create_bench_user('bench_business', 'business')
+    details = []
+    for i in range(offers):
+        offer = Offer.objects.create(user=business, title=f'Bench Offer {i}', description='Benchmark offer ' * 20)
+        for offer_type, price, days in OFFER_TYPES:
+            details.append(OfferDetail(
+                offer=offer, title=f'{offer_type} {i}', revisions=1, price=price,
+                delivery_time=days, delivery_time_in_days=days, features=['a', 'b'], offer_type=offer_type,
+            ))
+    OfferDetail.objects.bulk_create(details)
+    customer_tokens = [create_bench_user(f'bench_customer_{i}', 'customer')[1] for i in range(customers)]
+    return {
+        'business_id': business.id,
+        'business_token': business_token,
+        'customer_tokens': customer_tokens,
+        'offer_ids': list(Offer.objects.values_list('id', flat=True)),
+        'detail_ids': list(OfferDetail.objects.values_list('id', flat=True)),
+    }
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of a list of floats (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
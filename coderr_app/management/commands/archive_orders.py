@@ -0,0 +1,20 @@
+"""Moves old completed and cancelled orders into the archive table"""
+from django.core.management.base import BaseCommand
+from coderr_app.queries.order_archive import archivable_orders, archive_cutoff, archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Archives completed/cancelled orders not changed for ORDER_ARCHIVE_AFTER_DAYS days, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Alter in Tagen (Standard: ORDER_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, help='Bestellungen pro Transaktion (Standard: ORDER_ARCHIVE_BATCH_SIZE).')
+        parser.add_argument('--dry-run', action='store_true', help='Nur zählen, nichts verschieben.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_orders(archive_cutoff(options['days'])).count()
+            self.stdout.write(f'{count} Bestellungen würden archiviert.')
+            return
+        moved = archive_orders(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{moved} Bestellungen archiviert.'))
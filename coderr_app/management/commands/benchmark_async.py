@@ -0,0 +1,77 @@
+"""Compares how many concurrent requests one ASGI process sustains on the sync and async read paths"""
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from coderr_app.management.commands._bench import percentile, scratch_database, seed_marketplace
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the sync DRF read endpoints against their async variants inside one ASGI process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', default='1,10,50,100', help='Comma separated concurrency levels.')
+        parser.add_argument('--requests', type=int, default=300, help='Requests per level and path.')
+        parser.add_argument('--offers', type=int, default=50, help='Number of seeded offers.')
+        parser.add_argument('--slo-ms', type=float, default=250.0, help='p95 latency budget for "sustained".')
+
+    def handle(self, *args, **options):
+        levels = [int(x) for x in options['levels'].split(',') if x.strip()]
+        with scratch_database():
+            seed = seed_marketplace(offers=options['offers'])
+            headers = {'authorization': f'Token {seed["customer_tokens"][0]}'}
+            business_id = seed['business_id']
+            paths = {
+                'sync': ['/api/offers/', '/api/base-info/', f'/api/order-count/{business_id}/',
+                         f'/api/offers/{seed["offer_ids"][0]}/'],
+                'async': ['/api/async/offers/', '/api/async/base-info/', f'/api/async/order-count/{business_id}/',
+                          f'/api/async/offers/{seed["offer_ids"][0]}/'],
+            }
+            results = asyncio.run(self._run_all(paths, levels, options['requests'], headers))
+        self._report(results, options['slo_ms'])
+
+    async def _run_all(self, paths, levels, total, headers):
+        client = AsyncClient()
+        results = {}
+        for mode, mode_paths in paths.items():
+            await self._run_level(client, mode_paths, 1, len(mode_paths), headers)
+            results[mode] = [await self._run_level(client, mode_paths, level, total, headers) for level in levels]
+        return results
+
+    async def _run_level(self, client, paths, concurrency, total, headers):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(paths[i % len(paths)], headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        return {
+            'concurrency': concurrency,
+            'rps': total / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'errors': errors,
+        }
+
+    def _report(self, results, slo_ms):
+        self.stdout.write(f'{"mode":<6} {"conc":>5} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>7}')
+        for mode, rows in results.items():
+            for row in rows:
+                self.stdout.write(
+                    f'{mode:<6} {row["concurrency"]:>5} {row["rps"]:>9.1f} {row["p50"]:>9.1f} '
+                    f'{row["p95"]:>9.1f} {row["errors"]:>7}'
+                )
+        for mode, rows in results.items():
+            sustained = [row['concurrency'] for row in rows if row['p95'] <= slo_ms and not row['errors']]
+            best = max(sustained) if sustained else 0
+            self.stdout.write(f'{mode}: {best} in-flight requests sustained within p95 <= {slo_ms:.0f} ms')
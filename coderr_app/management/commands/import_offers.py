@@ -0,0 +1,60 @@
+"""Imports offers for a business user from an NDJSON file (one offer object per line)"""
+import json
+import sys
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from auth_app.models import Profile
+from coderr_app.queries.offer_import import import_offers
+
+
+class Command(BaseCommand):
+    help = 'Imports offers from NDJSON, validates every line like POST /api/offers/ and inserts in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file, "-" reads from stdin.')
+        parser.add_argument('--user', required=True, help='Username or id of the business user.')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        user = self._business_user(options['user'])
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        created = failed = 0
+        try:
+            batch = []
+            for line_no, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append((line_no, json.loads(line)))
+                except json.JSONDecodeError as exc:
+                    failed += 1
+                    self.stderr.write(f'Zeile {line_no}: ungültiges JSON ({exc.msg})')
+                    continue
+                if len(batch) >= options['batch_size']:
+                    created, failed = self._flush(user, batch, created, failed)
+                    batch = []
+            if batch:
+                created, failed = self._flush(user, batch, created, failed)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(f'{created} Angebote importiert, {failed} fehlerhaft.'))
+
+    def _flush(self, user, batch, created, failed):
+        results = import_offers(user, [item for _, item in batch])
+        for (line_no, _), result in zip(batch, results):
+            if result['status'] == 'created':
+                created += 1
+            else:
+                failed += 1
+                self.stderr.write(f'Zeile {line_no}: {json.dumps(result["errors"], ensure_ascii=False)}')
+        return created, failed
+
+    def _business_user(self, ident):
+        lookup = {'pk': int(ident)} if ident.isdigit() else {'username': ident}
+        user = User.objects.filter(**lookup).first()
+        if not user:
+            raise CommandError(f'Benutzer "{ident}" nicht gefunden.')
+        if not Profile.objects.filter(user=user, type='business').exists():
+            raise CommandError(f'Benutzer "{ident}" ist kein Business-Benutzer.')
+        return user
@@ -0,0 +1,11 @@
+"""Deletes expired Idempotency-Key records"""
+from django.core.management.base import BaseCommand
+from core.utils.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored Idempotency-Key responses whose TTL has expired.'
+
+    def handle(self, *args, **options):
+        removed = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'{removed} abgelaufene Idempotency-Keys gelöscht.'))
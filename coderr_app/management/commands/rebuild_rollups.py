@@ -0,0 +1,14 @@
+"""Recomputes the BusinessDailyStats rollups from the orders table"""
+from django.core.management.base import BaseCommand
+from coderr_app.queries.rollup_services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily order/revenue rollups, for all business users or the given ids.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-user', type=int, action='append', dest='business_users', help='Nur diese Business-User-ID (mehrfach möglich).')
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(options['business_users'])
+        self.stdout.write(self.style.SUCCESS(f'{rows} Tageswerte neu berechnet.'))
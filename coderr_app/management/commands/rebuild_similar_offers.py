@@ -0,0 +1,11 @@
+"""Rebuilds the similar offers index from scratch"""
+from django.core.management.base import BaseCommand
+from coderr_app.queries.similarity_services import rebuild_similarity_index
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the TF-IDF neighbours of all offers (incremental updates run in the background).'
+
+    def handle(self, *args, **options):
+        count = rebuild_similarity_index()
+        self.stdout.write(self.style.SUCCESS(f'Ähnliche Angebote für {count} Angebote berechnet.'))
@@ -0,0 +1,25 @@
+"""Builds missing or outdated thumbnail variants for offer images and profile pictures"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from coderr_app.queries.image_services import IMAGE_FIELDS, process_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Generates WebP/JPEG variants for stored uploads (e.g. after changing IMAGE_VARIANTS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Auch aktuelle Varianten neu erzeugen.')
+
+    def handle(self, *args, **options):
+        for label, (field_name, _variants_field) in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            pks = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).values_list('pk', flat=True)
+            done = failed = 0
+            for pk in pks.iterator():
+                try:
+                    if process_image_variants(label, pk, force=options['force']) is not None:
+                        done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{label} #{pk}: {exc}')
+            self.stdout.write(self.style.SUCCESS(f'{label}: {done} erzeugt, {failed} fehlgeschlagen.'))
@@ -0,0 +1,26 @@
+"""Continues account purges that failed or were interrupted by a restart"""
+from django.core.management.base import BaseCommand
+from auth_app.models import AccountDeletionJob
+from coderr_app.queries.account_deletion import run_account_deletion
+
+
+class Command(BaseCommand):
+    help = 'Resumes all unfinished account deletion jobs (or the given ids) at their recorded step.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append', dest='jobs', help='Nur diesen Job (mehrfach möglich).')
+
+    def handle(self, *args, **options):
+        jobs = AccountDeletionJob.objects.exclude(status='done').order_by('created_at')
+        if options['jobs']:
+            jobs = jobs.filter(pk__in=options['jobs'])
+        done = 0
+        for job in jobs:
+            try:
+                progress = run_account_deletion(job.pk)
+            except Exception as exc:
+                self.stderr.write(f'Job {job.pk} ({job.username}) fehlgeschlagen: {exc}')
+                continue
+            done += 1
+            self.stdout.write(f'Job {job.pk} ({job.username}): {progress}')
+        self.stdout.write(self.style.SUCCESS(f'{done} Löschungen abgeschlossen.'))
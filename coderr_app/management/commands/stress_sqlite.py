@@ -0,0 +1,87 @@
+"""Measures order-write throughput and lock errors with and without the SQLite production profile"""
+import json
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client
+from core.utils.sqlite import SQLITE_PRODUCTION_CONN_MAX_AGE, sqlite_production_options
+from coderr_app.management.commands._bench import scratch_database, seed_marketplace
+
+PROFILES = {
+    'baseline': {'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE'}, 'CONN_MAX_AGE': 0},
+    'production': {'OPTIONS': sqlite_production_options(), 'CONN_MAX_AGE': SQLITE_PRODUCTION_CONN_MAX_AGE},
+}
+
+
+class Command(BaseCommand):
+    help = 'Creates orders from many threads while hammering the offers list, once per SQLite profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--profiles', default='baseline,production')
+
+    def handle(self, *args, **options):
+        rows = []
+        for name in options['profiles'].split(','):
+            with scratch_database():
+                seed = seed_marketplace(offers=20, customers=options['writers'])
+                self._apply_profile(PROFILES[name.strip()])
+                rows.append((name.strip(), self._run(seed, options)))
+        self.stdout.write(f'{"profile":<11} {"orders/s":>9} {"reads/s":>9} {"lock errors":>12} {"error rate":>11}')
+        for name, result in rows:
+            attempts = result['orders'] + result['lock_errors']
+            rate = result['lock_errors'] / attempts if attempts else 0.0
+            self.stdout.write(
+                f'{name:<11} {result["orders"] / result["seconds"]:>9.1f} {result["reads"] / result["seconds"]:>9.1f} '
+                f'{result["lock_errors"]:>12} {rate:>10.1%}'
+            )
+
+    def _apply_profile(self, profile):
+        connections.close_all()
+        settings_dict = connections['default'].settings_dict
+        settings_dict['OPTIONS'] = dict(profile['OPTIONS'])
+        settings_dict['CONN_MAX_AGE'] = profile['CONN_MAX_AGE']
+
+    def _run(self, seed, options):
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {'orders': 0, 'reads': 0, 'lock_errors': 0, 'other_errors': 0}
+
+        def count(key):
+            with lock:
+                result[key] += 1
+
+        def writer(token, detail_ids):
+            client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+            i = 0
+            while not stop.is_set():
+                body = json.dumps({'offer_detail_id': detail_ids[i % len(detail_ids)]})
+                response = client.post('/api/orders/', body, content_type='application/json')
+                count('orders' if response.status_code == 201 else
+                      'lock_errors' if response.status_code in (500, 503) else 'other_errors')
+                close_old_connections()
+                i += 1
+            connections.close_all()
+
+        def reader():
+            client = Client()
+            while not stop.is_set():
+                response = client.get('/api/offers/')
+                count('reads' if response.status_code == 200 else 'other_errors')
+                close_old_connections()
+            connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(token, seed['detail_ids'])) for token in seed['customer_tokens']]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        result['seconds'] = time.perf_counter() - started
+        return result
@@ -0,0 +1,13 @@
+"""Copies the primary SQLite database into the configured read replicas"""
+from django.core.management.base import BaseCommand, CommandError
+from core.utils.db_router import replica_aliases, sync_sqlite_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into every replica from CODERR_DB_REPLICAS (local replication stand-in).'
+
+    def handle(self, *args, **options):
+        if not replica_aliases():
+            raise CommandError('Keine Replicas konfiguriert (CODERR_DB_REPLICAS ist leer).')
+        for alias in sync_sqlite_replicas():
+            self.stdout.write(self.style.SUCCESS(f'{alias} synchronisiert.'))
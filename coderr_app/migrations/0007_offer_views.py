@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0006_business_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='views',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0007_offer_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSimilarity',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='coderr_app.offer')),
+                ('neighbours', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,15 +1,19 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from core.utils.tracking import ChangeTrackingMixin
 
 User = get_user_model()
 
-class Offer(models.Model):
+class Offer(ChangeTrackingMixin, models.Model):
     """Defines model for Offer"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offers')
     title = models.CharField(max_length=255)
     image = models.ImageField(upload_to='offers/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True)
+    views = models.PositiveIntegerField(default=0, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,7 +21,7 @@ class Offer(models.Model):
         return f'Offer #{self.pk} by {self.user_id}: {self.title[:30]}'
 
 
-class OfferDetail(models.Model):
+class OfferDetail(ChangeTrackingMixin, models.Model):
     """Defines model for OfferDetail"""
     offer = models.ForeignKey(Offer, on_delete=models.CASCADE, related_name='details')
     price = models.DecimalField(max_digits=10, decimal_places=2)                      
@@ -47,7 +51,7 @@ class OfferDetail(models.Model):
         return f'OfferDetail #{self.pk} of Offer #{self.offer_id} (price={self.price}, days={self.delivery_time})'
 
 
-class Order(models.Model):
+class Order(ChangeTrackingMixin, models.Model):
     """Defines model for Order"""
     customer_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_orders')
     business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='business_orders')
@@ -78,7 +82,27 @@ class Order(models.Model):
         return f'Order #{self.pk} ({self.title}) c={self.customer_user_id} b={self.business_user_id}'
     
 
-class Review(models.Model):
+class ArchivedOrder(models.Model):
+    """Defines an archived completed or cancelled order, same columns and ids as Order so both tables can be read as one"""
+    id = models.BigIntegerField(primary_key=True)
+    customer_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_customer_orders')
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_business_orders')
+    title = models.CharField(max_length=255)
+    revisions = models.PositiveIntegerField(default=0)
+    delivery_time_in_days = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    features = models.JSONField(default=list, blank=True, null=True)
+    offer_type = models.CharField(max_length=20, choices=Order._meta.get_field('offer_type').choices)
+    status = models.CharField(max_length=30, choices=Order._meta.get_field('status').choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'Archived order #{self.pk} ({self.title}) c={self.customer_user_id} b={self.business_user_id}'
+
+
+class Review(ChangeTrackingMixin, models.Model):
     """Defines model for Review"""
     business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_reviews')
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='written_reviews')
@@ -96,4 +120,55 @@ class Review(models.Model):
         ]
 
     def __str__(self):
-        return f'Review #{self.pk} b={self.business_user_id} r={self.reviewer_id} rating={self.rating}'
\ No newline at end of file
+        return f'Review #{self.pk} b={self.business_user_id} r={self.reviewer_id} rating={self.rating}'
+
+
+class BusinessDailyStats(models.Model):
+    """Defines the per business user and day rollup of orders, bucketed by the order's creation day"""
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    delivered_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivery_days_total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_user', 'day'], name='unique_business_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f'Stats b={self.business_user_id} {self.day}: {self.order_count} orders'
+
+
+class OfferSimilarity(models.Model):
+    """Defines the precomputed top-K similar offers of an offer as [[offer_id, score], ...]"""
+    offer = models.OneToOneField(Offer, on_delete=models.CASCADE, primary_key=True, related_name='similarity')
+    neighbours = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Similar offers of #{self.offer_id} ({len(self.neighbours)})'
+
+
+class IdempotencyKey(models.Model):
+    """Defines the stored outcome of a create request sent with an Idempotency-Key header, response is null while in progress"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f'Idempotency key {self.key[:20]} u={self.user_id} ({self.status_code or "pending"})'
@@ -0,0 +1,95 @@
+"""Provides account deletion as an immediate soft-disable followed by a chunked background purge"""
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from auth_app.models import AccountDeletionJob
+from coderr_app.models import ArchivedOrder, BusinessDailyStats, Offer, Order, Review
+from coderr_app.queries.rollup_services import subtract_orders, suspend_rollups
+from core.utils.background import enqueue_on_commit
+from core.utils.retry import retry_on_contention
+
+# Purges of large accounts run for minutes, they get their own worker so image variants and similarity refreshes go on
+PURGE_QUEUE = 'account-purge'
+PURGE_STEPS = (
+    'offers', 'reviews', 'customer_orders', 'business_orders',
+    'customer_archived_orders', 'business_archived_orders', 'daily_stats', 'account',
+)
+
+
+def purge_chunk_size():
+    return getattr(settings, 'ACCOUNT_DELETION_CHUNK_SIZE', 500)
+
+
+def _step_queryset(step, account_id):
+    """Rows of one purge step, offers go first so they leave the marketplace quickly"""
+    if step == 'offers':
+        return Offer.objects.filter(user_id=account_id)
+    if step == 'reviews':
+        return Review.objects.filter(Q(business_user_id=account_id) | Q(reviewer_id=account_id))
+    if step == 'customer_orders':
+        return Order.objects.filter(customer_user_id=account_id)
+    if step == 'business_orders':
+        return Order.objects.filter(business_user_id=account_id)
+    if step == 'customer_archived_orders':
+        return ArchivedOrder.objects.filter(customer_user_id=account_id)
+    if step == 'business_archived_orders':
+        return ArchivedOrder.objects.filter(business_user_id=account_id)
+    if step == 'daily_stats':
+        return BusinessDailyStats.objects.filter(business_user_id=account_id)
+    return User.objects.filter(pk=account_id)
+
+
+@retry_on_contention('account_purge')
+def _delete_chunk(step, account_id, size):
+    """Deletes up to size rows of a step in a short transaction, returns how many were removed"""
+    queryset = _step_queryset(step, account_id)
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:size])
+    if not ids:
+        return 0
+    chunk = queryset.model.objects.filter(pk__in=ids)
+    with suspend_rollups():
+        if step in ('customer_orders', 'customer_archived_orders'):
+            subtract_orders(chunk)
+        chunk.delete()
+    return len(ids)
+
+
+def _update_job(job_id, **fields):
+    AccountDeletionJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_account_deletion(job_id):
+    """Background task, resumes at the recorded step and stores progress after every chunk"""
+    job = AccountDeletionJob.objects.exclude(status='done').filter(pk=job_id).first()
+    if job is None:
+        return None
+    _update_job(job.pk, status='running', error='')
+    progress = dict(job.progress)
+    size = purge_chunk_size()
+    start = PURGE_STEPS.index(job.stage) if job.stage in PURGE_STEPS else 0
+    try:
+        for step in PURGE_STEPS[start:]:
+            _update_job(job.pk, stage=step)
+            while deleted := _delete_chunk(step, job.account_id, size):
+                progress[step] = progress.get(step, 0) + deleted
+                _update_job(job.pk, progress=progress)
+    except Exception as exc:
+        _update_job(job.pk, status='failed', error=str(exc), progress=progress)
+        raise
+    _update_job(job.pk, status='done', progress=progress, finished_at=timezone.now())
+    return progress
+
+
+@transaction.atomic
+def start_account_deletion(user):
+    """Disables login and revokes tokens at once, the purge is queued after commit"""
+    User.objects.filter(pk=user.pk).update(is_active=False, password=make_password(None))
+    Token.objects.filter(user_id=user.pk).delete()
+    job, _created = AccountDeletionJob.objects.get_or_create(account_id=user.pk, defaults={'username': user.username})
+    if job.status != 'done':
+        enqueue_on_commit(run_account_deletion, job.pk, queue_name=PURGE_QUEUE)
+    return job
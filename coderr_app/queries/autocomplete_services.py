@@ -0,0 +1,258 @@
+"""Provides the in-process prefix index behind offers/autocomplete, kept consistent across workers via a cache version
+
+The version lives in the default cache, so workers only see each other's changes with a shared cache
+(CODERR_REDIS_URL). With the per-process LocMemCache every worker keeps serving its own index.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from itertools import groupby
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError, transaction
+from coderr_app.models import Offer
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'offer-autocomplete:version'
+# Ranked offers kept per prefix (more than AUTOCOMPLETE_MAX_LIMIT, so removals rarely force a rescan)
+BUCKET_SIZE = 50
+# Prefixes up to this length are ranked when the index is built, longer ones on first use
+PRECOMPUTED_PREFIX_LENGTH = 3
+MAX_CACHED_PREFIXES = 50_000
+
+
+def normalize(text):
+    """Casefolded text without accents and with single spaces, 'Café  Design' -> 'cafe design'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def _keys(title):
+    """The whole title plus every word suffix, so 'design' finds 'Logo Design'"""
+    words = normalize(title).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _prefixes(title):
+    """Every prefix of every key of the title, each once"""
+    return {key[:length] for key in _keys(title) for length in range(1, len(key) + 1)}
+
+
+def _rank(prefix, offer_id, offer):
+    """Sort key within a prefix: title starts with the prefix first, then by popularity, title and id"""
+    _title, views, normalized = offer
+    return (0 if normalized.startswith(prefix) else 1, -views, normalized, offer_id)
+
+
+class _Bucket:
+    """Best ranks of one prefix, complete when it holds every matching offer"""
+    __slots__ = ('ranks', 'complete')
+
+    def __init__(self, ranks, complete):
+        self.ranks = ranks
+        self.complete = complete
+
+
+class PrefixIndex:
+    """Sorted (key, offer_id) array plus rank-sorted top lists per prefix, kept current on add/remove
+
+    A lookup reads one capped list, only a prefix seen for the first time scans its key range. All access goes
+    through one lock because on_commit callbacks change the index while requests read it.
+    """
+
+    def __init__(self, rows=()):
+        self.offers = {}
+        entries = []
+        for offer_id, title, views in rows:
+            self.offers[offer_id] = (title, views, normalize(title))
+            entries.extend((key, offer_id) for key in _keys(title))
+        entries.sort()
+        self.entries = entries
+        self._top = OrderedDict()
+        self._lock = threading.Lock()
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            for prefix, group in groupby(entries, key=lambda entry: entry[0][:length]):
+                if len(prefix) == length:
+                    self._top[prefix] = self._bucket(prefix, {offer_id for _key, offer_id in group}, BUCKET_SIZE)
+
+    def _bucket(self, prefix, offer_ids, size):
+        ranks = heapq.nsmallest(size + 1, (_rank(prefix, offer_id, self.offers[offer_id]) for offer_id in offer_ids))
+        return _Bucket(ranks[:size], complete=len(ranks) <= size)
+
+    def _scan(self, prefix, size):
+        """Ranks the whole key range of the prefix, only for prefixes without a bucket"""
+        start = bisect.bisect_left(self.entries, (prefix,))
+        end = bisect.bisect_left(self.entries, (prefix + '\U0010ffff',), start)
+        return self._bucket(prefix, {offer_id for _key, offer_id in self.entries[start:end]}, size)
+
+    def add(self, offer_id, title, views=0):
+        with self._lock:
+            self._remove(offer_id)
+            offer = self.offers[offer_id] = (title, views, normalize(title))
+            for key in _keys(title):
+                bisect.insort(self.entries, (key, offer_id))
+            for prefix in _prefixes(title):
+                bucket = self._top.get(prefix)
+                if bucket is None:
+                    continue
+                bisect.insort(bucket.ranks, _rank(prefix, offer_id, offer))
+                if len(bucket.ranks) > BUCKET_SIZE:
+                    bucket.ranks.pop()
+                    bucket.complete = False
+
+    def remove(self, offer_id):
+        with self._lock:
+            self._remove(offer_id)
+
+    def _remove(self, offer_id):
+        offer = self.offers.pop(offer_id, None)
+        if offer is None:
+            return
+        for key in _keys(offer[0]):
+            position = bisect.bisect_left(self.entries, (key, offer_id))
+            if position < len(self.entries) and self.entries[position] == (key, offer_id):
+                del self.entries[position]
+        max_limit = getattr(settings, 'AUTOCOMPLETE_MAX_LIMIT', 25)
+        for prefix in _prefixes(offer[0]):
+            bucket = self._top.get(prefix)
+            if bucket is None:
+                continue
+            rank = _rank(prefix, offer_id, offer)
+            position = bisect.bisect_left(bucket.ranks, rank)
+            if position < len(bucket.ranks) and bucket.ranks[position] == rank:
+                del bucket.ranks[position]
+            if not bucket.complete and len(bucket.ranks) < max_limit:
+                del self._top[prefix]
+
+    def search(self, query, limit):
+        """Top matches: title starts with the query first, then by popularity and title"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            if limit > BUCKET_SIZE:
+                ranks = self._scan(prefix, limit).ranks
+            else:
+                bucket = self._top.get(prefix)
+                if bucket is None:
+                    bucket = self._top[prefix] = self._scan(prefix, BUCKET_SIZE)
+                    if len(self._top) > MAX_CACHED_PREFIXES:
+                        self._top.popitem(last=False)
+                else:
+                    self._top.move_to_end(prefix)
+                ranks = bucket.ranks
+            return [{'id': rank[-1], 'title': self.offers[rank[-1]][0]} for rank in ranks[:limit]]
+
+
+class _State:
+    index = None
+    version = None
+    checked_at = 0.0
+
+
+_state = _State()
+_lock = threading.Lock()
+
+
+def _current_version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def _build():
+    rows = Offer.objects.values_list('id', 'title', 'views').iterator(chunk_size=2000)
+    return PrefixIndex(rows)
+
+
+def get_autocomplete_index():
+    """Builds lazily per process and rebuilds when another worker bumped the version (checked at most every N s)"""
+    interval = getattr(settings, 'AUTOCOMPLETE_VERSION_CHECK_SECONDS', 1)
+    now = time.monotonic()
+    with _lock:
+        if _state.index is not None and now - _state.checked_at < interval:
+            return _state.index
+        version = _current_version()
+        _state.checked_at = now
+        if _state.index is not None and version == _state.version:
+            return _state.index
+    index = _build()
+    with _lock:
+        _state.index, _state.version = index, version
+    return index
+
+
+def warm_autocomplete_index():
+    """Builds the index when a worker starts (core.wsgi, core.asgi), so the first request does not pay for it"""
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        logger.warning('Autocomplete index not built at startup, it is built on first use', exc_info=True)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Autocomplete index versions need a cache all workers share"""
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return [checks.Warning(
+            'The default cache is a per-process LocMemCache.',
+            hint='Configure a shared cache (CODERR_REDIS_URL) when running more than one worker, otherwise offer '
+                 'changes only reach the autocomplete index of the worker that saved them.',
+            id='coderr.W002',
+        )]
+    return []
+
+
+def _bump_version():
+    """Tells other workers to rebuild, returns True if no foreign change happened since our last sync"""
+    try:
+        version = cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(VERSION_CACHE_KEY, 1, timeout=None)
+        version = cache.incr(VERSION_CACHE_KEY)
+    with _lock:
+        in_sync = _state.version is not None and version == _state.version + 1
+        _state.version = version if in_sync else None
+        if not in_sync:
+            _state.checked_at = 0.0
+    return in_sync
+
+
+def _apply_local(change):
+    with _lock:
+        if _state.index is not None:
+            change(_state.index)
+
+
+def offer_title_changed(offer):
+    """Updates this worker's index in place after commit and signals the others"""
+    offer_id, title, views = offer.pk, offer.title, offer.views
+
+    def on_commit():
+        if _bump_version():
+            _apply_local(lambda index: index.add(offer_id, title, views))
+    transaction.on_commit(on_commit)
+
+
+def offer_removed(offer_id):
+    """Drops the offer from this worker's index after commit and signals the others"""
+    def on_commit():
+        if _bump_version():
+            _apply_local(lambda index: index.remove(offer_id))
+    transaction.on_commit(on_commit)
+
+
+def invalidate_autocomplete():
+    """For bulk writes without signals, every worker (including this one) rebuilds on next use"""
+    def on_commit():
+        _bump_version()
+        with _lock:
+            _state.version = None
+            _state.checked_at = 0.0
+    transaction.on_commit(on_commit)
@@ -0,0 +1,50 @@
+"""Provides the background task that builds thumbnail variants for offer images and profile pictures"""
+from django.apps import apps
+from django.db.models import Q
+from core.utils.background import enqueue_on_commit
+from core.utils.images import delete_image_variants, generate_image_variants
+
+IMAGE_FIELDS = {
+    'coderr_app.Offer': ('image', 'image_variants'),
+    'auth_app.Profile': ('file', 'file_variants'),
+}
+
+
+def variants_outdated(instance, field_name, variants_field):
+    """True when the stored variants do not belong to the current upload"""
+    field_file = getattr(instance, field_name)
+    stored = getattr(instance, variants_field) or {}
+    return (field_file.name or None) != stored.get('source')
+
+
+def process_image_variants(label, pk, force=False):
+    """Generates variants for one row and stores them only if the upload did not change meanwhile"""
+    model = apps.get_model(label)
+    field_name, variants_field = IMAGE_FIELDS[label]
+    instance = model.objects.filter(pk=pk).only('pk', field_name, variants_field).first()
+    if instance is None or not (force or variants_outdated(instance, field_name, variants_field)):
+        return None
+    field_file = getattr(instance, field_name)
+    previous = (getattr(instance, variants_field) or {}).get('variants')
+    if field_file.name:
+        result = {'source': field_file.name, 'variants': generate_image_variants(field_file)}
+        unchanged = Q(**{field_name: field_file.name})
+    else:
+        result = {}
+        unchanged = Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{variants_field: result})
+    if updated:
+        delete_image_variants(field_file.storage, previous, keep=result.get('variants'))
+    else:
+        delete_image_variants(field_file.storage, result.get('variants'))
+    return result
+
+
+def schedule_image_variants(instance, update_fields=None):
+    """Queues variant generation after commit when the instance holds a new or removed upload"""
+    label = instance._meta.label
+    field_name, variants_field = IMAGE_FIELDS[label]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    if variants_outdated(instance, field_name, variants_field):
+        enqueue_on_commit(process_image_variants, label, instance.pk, using=instance._state.db)
@@ -1,32 +1,59 @@
-from django.db.models import F, Q, Min, Case, When, IntegerField
+from django.db.models import F, Q, Min, Case, When, IntegerField, Prefetch
 from rest_framework.exceptions import ValidationError
-from coderr_app.models import Offer
+from coderr_app.models import Offer, OfferDetail
 
-ALLOWED_ORDERING = {'updated_at', '-updated_at', 'min_price', '-min_price'}
+ALLOWED_ORDERING = {'updated_at', '-updated_at', 'min_price', '-min_price', 'popular'}
+ORDERING_ALIASES = {'popular': ('-views', '-updated_at')}
 
 
-def _base_offer_queryset():
+def _min_delivery_time():
+    """Min delivery days over all details, falling back to delivery_time"""
+    return Min(
+        Case(
+            When(
+                details__delivery_time_in_days__isnull=False,
+                then=F('details__delivery_time_in_days')
+            ),
+            default=F('details__delivery_time'),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def _details_prefetch(expand):
+    """Full detail rows when expanded, otherwise only the ids the mini serializers render"""
+    if expand:
+        return Prefetch('details')
+    return Prefetch('details', queryset=OfferDetail.objects.only('id', 'offer_id'))
+
+
+def _base_offer_queryset(expand=False):
     """Builds the basic queryset including annotations"""
     return (
         Offer.objects
         .select_related('user')
-        .prefetch_related('details')
+        .prefetch_related(_details_prefetch(expand))
         .annotate(
-            min_delivery_time=Min(
-                Case(
-                    When(
-                        details__delivery_time_in_days__isnull=False,
-                        then=F('details__delivery_time_in_days')
-                    ),
-                    default=F('details__delivery_time'),
-                    output_field=IntegerField(),
-                )
-            ),
+            min_delivery_time=_min_delivery_time(),
             min_price=Min('details__price'),
         )
     )
 
 
+def _sparse_offer_queryset(fields, params, expand=False):
+    """Annotates only the aggregates that are requested or needed by filters and ordering"""
+    ordering = params.get('ordering') or ''
+    annotations = {}
+    if 'min_delivery_time' in fields or params.get('max_delivery_time'):
+        annotations['min_delivery_time'] = _min_delivery_time()
+    if 'min_price' in fields or params.get('min_price') or ordering.lstrip('-') == 'min_price':
+        annotations['min_price'] = Min('details__price')
+    qs = Offer.objects.annotate(**annotations) if annotations else Offer.objects.all()
+    if 'details' in fields:
+        qs = qs.prefetch_related(_details_prefetch(expand))
+    return qs
+
+
 def _parse_int(value, field_name):
     """Parses integer, throws error if not an int"""
     if value is None or value == '':
@@ -51,7 +78,7 @@ def _validate_ordering(value):
     if not value:
         return '-updated_at'
     if value not in ALLOWED_ORDERING:
-        raise ValidationError({'ordering': 'Ungültig: updated_at, -updated_at, min_price, -min_price'})
+        raise ValidationError({'ordering': 'Ungültig: updated_at, -updated_at, min_price, -min_price, popular'})
     return value
   
 
@@ -74,12 +101,18 @@ def _apply_filters(qs, params):
         qs = qs.filter(Q(title__icontains=search) | Q(description__icontains=search))
 
     ordering = _validate_ordering(params.get('ordering'))
-    return qs.order_by(ordering)
+    return qs.order_by(*ORDERING_ALIASES.get(ordering, (ordering,)))
 
 
-def build_offer_queryset(request):
-    """Public API, builds and filters queryset depending on method"""
-    qs = _base_offer_queryset()
+def build_offer_queryset(request, fields=None, expand=False):
+    """Public API, builds and filters queryset depending on method, fields narrows the aggregates"""
+    params = getattr(request, 'query_params', request.GET)
+    qs = _base_offer_queryset(expand) if fields is None else _sparse_offer_queryset(fields, params, expand)
     if request.method == 'GET':
-        qs = _apply_filters(qs, request.query_params)
-    return qs
\ No newline at end of file
+        qs = _apply_filters(qs, params)
+    return qs
+
+
+def build_offer_retrieve_queryset(expand=False):
+    """Public API, annotated queryset for single offer lookups, expand loads full detail rows"""
+    return _base_offer_queryset(expand)
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Validates offer batches item by item and imports the valid ones in one go"""
+from coderr_app.api.serializers import OfferCreateSerializer
+from coderr_app.queries.offer_services import bulk_insert_offers
+
+
+def import_offers(user, items, context=None):
+    """Returns one result per item, invalid items are reported without aborting the batch"""
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 'error', 'errors': {'detail': 'Objekt erwartet.'}}
+            continue
+        serializer = OfferCreateSerializer(data=item, context=context or {})
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    offers = bulk_insert_offers(user, [data for _, data in valid]) if valid else []
+    for (index, _), offer in zip(valid, offers):
+        results[index] = {'index': index, 'status': 'created', 'id': offer.pk}
+    return results
@@ -0,0 +1,41 @@
+"""Provides write helpers shared by single and bulk offer creation"""
+from coderr_app.models import Offer, OfferDetail
+from core.utils.retry import retry_on_contention
+from coderr_app.queries.similarity_services import schedule_similarity_refresh
+from coderr_app.queries.autocomplete_services import invalidate_autocomplete
+
+BULK_BATCH_SIZE = 500
+
+
+def build_offer_details(offer, details_data):
+    """Builds the unsaved detail rows of an offer from validated detail data"""
+    objs = []
+    for d in details_data:
+        dt_days = d.get('delivery_time_in_days')
+        objs.append(OfferDetail(
+            offer=offer,
+            title=d.get('title'),
+            revisions=d.get('revisions', 0),
+            delivery_time_in_days=dt_days,
+            delivery_time=dt_days,
+            price=d.get('price'),
+            features=d.get('features', []),
+            offer_type=d.get('offer_type'),
+        ))
+    return objs
+
+
+@retry_on_contention('offer_bulk_create')
+def bulk_insert_offers(user, validated_items):
+    """Inserts all offers and their details with batched statements inside one transaction"""
+    offers = Offer.objects.bulk_create(
+        [Offer(user=user, **{k: v for k, v in item.items() if k != 'details'}) for item in validated_items],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    details = []
+    for offer, item in zip(offers, validated_items):
+        details.extend(build_offer_details(offer, item['details']))
+    OfferDetail.objects.bulk_create(details, batch_size=BULK_BATCH_SIZE)
+    schedule_similarity_refresh(offer.pk for offer in offers)
+    invalidate_autocomplete()
+    return offers
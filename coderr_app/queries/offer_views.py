@@ -0,0 +1,9 @@
+"""Provides the buffered view counter behind the popular ordering of offers"""
+from core.utils.counters import BufferedCounter
+
+offer_view_counter = BufferedCounter('coderr_app.Offer', 'views')
+
+
+def record_offer_view(offer_id):
+    """Counts one view in memory, flushed in batches by the counter thread"""
+    offer_view_counter.increment(offer_id)
@@ -0,0 +1,60 @@
+"""Provides moving old finished orders into the archive table and reading both tables as one"""
+import datetime
+from django.conf import settings
+from django.utils import timezone
+from coderr_app.models import ArchivedOrder, Order
+from coderr_app.queries.rollup_services import suspend_rollups
+from core.utils.retry import retry_on_contention
+
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+ORDER_COLUMNS = tuple(field.attname for field in Order._meta.concrete_fields)
+
+
+def include_archived_requested(params):
+    """True for ?include_archived=1 (or true), archived rows are opt-in everywhere"""
+    return (params.get('include_archived') or '').lower() in ('1', 'true')
+
+
+def with_archived(queryset, archived_queryset, *ordering):
+    """UNION ALL of hot and archived rows read as Order instances, both sides select the same columns"""
+    names, is_defer = queryset.query.deferred_loading
+    if is_defer:
+        archived_queryset = archived_queryset.defer('archived_at', *names)
+    else:
+        # A union ordered by a column neither side selects fails in Django ('NoneType' ... item assignment)
+        order_columns = [name.lstrip('-') for name in ordering]
+        queryset = queryset.only(*names, *order_columns)
+        archived_queryset = archived_queryset.only(*names, *order_columns)
+    return queryset.order_by().union(archived_queryset.order_by(), all=True).order_by(*ordering)
+
+
+def archive_cutoff(days=None):
+    days = getattr(settings, 'ORDER_ARCHIVE_AFTER_DAYS', 365) if days is None else days
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def archivable_orders(cutoff):
+    return Order.objects.filter(status__in=ARCHIVE_STATUSES, updated_at__lt=cutoff)
+
+
+@retry_on_contention('order_archive')
+def archive_batch(cutoff, size):
+    """Copies up to size orders into the archive and deletes them in one transaction, returns the count"""
+    rows = list(archivable_orders(cutoff).order_by('pk').values(*ORDER_COLUMNS)[:size])
+    if not rows:
+        return 0
+    archived_at = timezone.now()
+    ArchivedOrder.objects.bulk_create([ArchivedOrder(archived_at=archived_at, **row) for row in rows])
+    with suspend_rollups():
+        Order.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_orders(days=None, batch_size=None):
+    """Moves finished orders not touched for days into the archive, batch by batch; rollups keep counting them"""
+    cutoff = archive_cutoff(days)
+    size = batch_size or getattr(settings, 'ORDER_ARCHIVE_BATCH_SIZE', 1000)
+    total = 0
+    while moved := archive_batch(cutoff, size):
+        total += moved
+    return total
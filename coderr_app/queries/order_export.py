@@ -0,0 +1,126 @@
+"""Provides the filtered order queryset and chunked NDJSON/CSV streams (sync and async) for the export"""
+import csv
+import datetime
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from core.utils.query import parse_date_param
+from coderr_app.models import ArchivedOrder, Order
+from coderr_app.queries.order_archive import include_archived_requested
+
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('customer_user', 'customer_user_id'),
+    ('business_user', 'business_user_id'),
+    ('title', 'title'),
+    ('revisions', 'revisions'),
+    ('delivery_time_in_days', 'delivery_time_in_days'),
+    ('price', 'price'),
+    ('features', 'features'),
+    ('offer_type', 'offer_type'),
+    ('status', 'status'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _export_filters(params):
+    """Validated lookups for ?status= and ?created_from= / ?created_to= (inclusive)"""
+    filters = {}
+    statuses = [s.strip() for s in (params.get('status') or '').split(',') if s.strip()]
+    if statuses:
+        allowed = {value for value, _label in Order._meta.get_field('status').choices}
+        unknown = set(statuses) - allowed
+        if unknown:
+            raise ValidationError({'status': f'Ungültiger Status: {", ".join(sorted(unknown))}'})
+        filters['status__in'] = statuses
+
+    created_from = parse_date_param(params, 'created_from')
+    created_to = parse_date_param(params, 'created_to')
+    if created_from and created_to and created_from > created_to:
+        raise ValidationError({'created_to': 'Darf nicht vor created_from liegen.'})
+    if created_from:
+        filters['created_at__gte'] = _start_of_day(created_from)
+    if created_to:
+        filters['created_at__lt'] = _start_of_day(created_to + datetime.timedelta(days=1))
+    return filters
+
+
+def build_export_queryset(user, params):
+    """Orders received by a business user as value rows, archived ones are added with ?include_archived=1"""
+    filters = _export_filters(params)
+    columns = [source for _name, source in EXPORT_COLUMNS]
+    qs = Order.objects.filter(business_user=user, **filters).values_list(*columns)
+    if include_archived_requested(params):
+        archived = ArchivedOrder.objects.filter(business_user=user, **filters).values_list(*columns)
+        qs = qs.union(archived, all=True)
+    return qs.order_by('created_at', 'id')
+
+
+def export_chunk_size():
+    return getattr(settings, 'ORDER_EXPORT_CHUNK_SIZE', 2000)
+
+
+class _Echo:
+    """File-like object whose write returns the line, lets csv.writer encode single rows"""
+
+    def write(self, value):
+        return value
+
+
+def _row_encoder(export_format):
+    """Header text and a function encoding one row: NDJSON objects, or CSV lines with features as JSON list"""
+    names = [name for name, _source in EXPORT_COLUMNS]
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        features_index = names.index('features')
+
+        def encode_csv(row):
+            values = list(row)
+            values[features_index] = json.dumps(values[features_index] or [], ensure_ascii=False)
+            return writer.writerow([v.isoformat() if isinstance(v, datetime.datetime) else v for v in values])
+        return writer.writerow(names), encode_csv
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return '', lambda row: encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def _fetch_chunk(rows, size):
+    return list(islice(rows, size))
+
+
+def iter_export(queryset, export_format):
+    """WSGI: the header, then one text block per database chunk, never holding the whole history in memory"""
+    header, encode = _row_encoder(export_format)
+    size = export_chunk_size()
+    rows = queryset.iterator(chunk_size=size)
+    if header:
+        yield header
+    while chunk := _fetch_chunk(rows, size):
+        yield ''.join(map(encode, chunk))
+
+
+async def aiter_export(queryset, export_format):
+    """ASGI: same blocks as iter_export, each chunk is fetched through sync_to_async so Django streams it"""
+    header, encode = _row_encoder(export_format)
+    size = export_chunk_size()
+    rows = queryset.iterator(chunk_size=size)
+    fetch = sync_to_async(_fetch_chunk)
+    try:
+        if header:
+            yield header
+        while chunk := await fetch(rows, size):
+            yield ''.join(map(encode, chunk))
+    finally:
+        await sync_to_async(rows.close)()
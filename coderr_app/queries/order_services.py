@@ -1,8 +1,12 @@
 from django.db.models import Q
+from django.utils import timezone
 from rest_framework.exceptions import APIException
-from rest_framework import status
-from coderr_app.models import Order, OfferDetail
+from rest_framework import serializers, status
+from coderr_app.models import ArchivedOrder, Order, OfferDetail
 from auth_app.models import Profile
+from coderr_app.queries.rollup_services import record_bulk_status_change, rollups_suspended
+from core.utils.events import publish_on_commit, user_channel
+from core.utils.retry import retry_on_contention
 
 
 def build_order_queryset(request):
@@ -15,6 +19,13 @@ def build_order_queryset(request):
     )
 
 
+def build_archived_order_queryset(request):
+    """Archived orders of the current user, combined with the hot ones via with_archived"""
+    user = request.user
+    return ArchivedOrder.objects.filter(Q(customer_user=user) | Q(business_user=user))
+
+
+@retry_on_contention('order_create')
 def create_order_from_offer_detail(request, validated_data):
     """Creates order from offer-detail id with all checks and errors"""
     offer_detail_id = validated_data['offer_detail_id']
@@ -25,7 +36,7 @@ def create_order_from_offer_detail(request, validated_data):
         raise _api_error('Nur Kunden dürfen Bestellungen erstellen.', status.HTTP_403_FORBIDDEN)
 
     detail = OfferDetail.objects.select_related('offer', 'offer__user').filter(pk=offer_detail_id).first()
-    if not detail:
+    if not detail or not detail.offer.user.is_active:
         raise _api_error('OfferDetail nicht gefunden.', status.HTTP_404_NOT_FOUND)
 
     business_user = detail.offer.user
@@ -44,9 +55,65 @@ def create_order_from_offer_detail(request, validated_data):
         features=detail.features or [],
         offer_type=detail.offer_type or (detail.name or '').lower() or 'basic',
     )
+    publish_order_event('order.created', order)
     return order
 
 
+@retry_on_contention('order_bulk_status')
+def bulk_update_order_status(business_user, order_ids, new_status):
+    """One locking read for ownership, one UPDATE for all changed orders, returns per-id results in input order"""
+    order_ids = list(dict.fromkeys(order_ids))
+    orders = Order.objects.select_for_update().in_bulk(order_ids)
+    results, changed = [], []
+    for order_id in order_ids:
+        order = orders.get(order_id)
+        if order is None:
+            results.append({'id': order_id, 'result': 'not_found', 'detail': 'Bestellung nicht gefunden.'})
+        elif order.business_user_id != business_user.id:
+            results.append({'id': order_id, 'result': 'forbidden', 'detail': 'Forbidden: nicht der Besitzer dieser Bestellung.'})
+        elif order.status == new_status:
+            results.append({'id': order_id, 'result': 'unchanged', 'status': new_status})
+        else:
+            results.append({'id': order_id, 'result': 'updated', 'status': new_status, 'previous_status': order.status})
+            changed.append(order)
+    if not changed:
+        return results
+
+    now = timezone.now()
+    Order.objects.filter(pk__in=[order.pk for order in changed], business_user_id=business_user.id).update(status=new_status, updated_at=now)
+    if not rollups_suspended():
+        record_bulk_status_change(business_user.id, changed, new_status)
+    for order in changed:
+        previous_status, order.status, order.updated_at = order.status, new_status, now
+        publish_order_event('order.status_changed', order, previous_status)
+    return results
+
+
+def _order_payload(order):
+    """Compact order snapshot for events, dates formatted like the API"""
+    as_datetime = serializers.DateTimeField().to_representation
+    return {
+        'id': order.id,
+        'customer_user': order.customer_user_id,
+        'business_user': order.business_user_id,
+        'title': order.title,
+        'price': str(order.price),
+        'offer_type': order.offer_type,
+        'status': order.status,
+        'created_at': as_datetime(order.created_at),
+        'updated_at': as_datetime(order.updated_at),
+    }
+
+
+def publish_order_event(event_type, order, previous_status=None):
+    """Notifies both parties of an order after commit, feeds the SSE streams"""
+    data = {'order': _order_payload(order)}
+    if previous_status is not None:
+        data['previous_status'] = previous_status
+    channels = {user_channel(order.business_user_id), user_channel(order.customer_user_id)}
+    publish_on_commit(channels, {'type': event_type, 'data': data})
+
+
 def _api_error(message, status_code):
     """Small helper, generates DRF compatible exceptions with same JSON body"""
     exc = APIException(detail={'detail': message})
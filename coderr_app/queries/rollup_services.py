@@ -0,0 +1,217 @@
+"""Provides incremental maintenance, rebuild and dashboard reads of the BusinessDailyStats rollups"""
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from coderr_app.models import ArchivedOrder, BusinessDailyStats, Order
+
+ORDER_STATUSES = tuple(value for value, _label in Order._meta.get_field('status').choices)
+REBUILD_BATCH_SIZE = 500
+
+_suspended = ContextVar('rollups_suspended', default=False)
+
+
+@contextmanager
+def suspend_rollups():
+    """Disables signal driven rollup updates, for bulk jobs that fix the rollups themselves"""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def rollups_suspended():
+    return _suspended.get()
+
+
+def rollup_day(created_at):
+    """Bucket of an order: its creation day in the project time zone"""
+    return timezone.localdate(created_at)
+
+
+def _order_contribution(status, price, delivery_days, sign=1):
+    """Column deltas one order adds to (sign=1) or removes from (sign=-1) its bucket"""
+    deltas = {
+        'order_count': sign,
+        f'{status}_count': sign,
+        'delivery_days_total': sign * (delivery_days or 0),
+    }
+    if status == 'completed':
+        deltas['completed_revenue'] = sign * Decimal(price or 0)
+    return deltas
+
+
+def apply_rollup_delta(business_user_id, day, deltas):
+    """Adds deltas with a single UPDATE ... SET col = col + x, creates the row on first use"""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {name: F(name) + value for name, value in deltas.items()}
+    rows = BusinessDailyStats.objects.filter(business_user_id=business_user_id, day=day)
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            BusinessDailyStats.objects.create(business_user_id=business_user_id, day=day, **deltas)
+    except IntegrityError:
+        rows.update(**updates)
+
+
+def record_order_created(order):
+    apply_rollup_delta(
+        order.business_user_id, rollup_day(order.created_at),
+        _order_contribution(order.status, order.price, order.delivery_time_in_days),
+    )
+
+
+def record_order_deleted(order):
+    apply_rollup_delta(
+        order.business_user_id, rollup_day(order.created_at),
+        _order_contribution(order.status, order.price, order.delivery_time_in_days, sign=-1),
+    )
+
+
+def _status_change_deltas(price, old_status, new_status, count=1):
+    deltas = {f'{old_status}_count': -count, f'{new_status}_count': count}
+    if old_status == 'completed':
+        deltas['completed_revenue'] = -Decimal(price or 0) * count
+    if new_status == 'completed':
+        deltas['completed_revenue'] = Decimal(price or 0) * count
+    return deltas
+
+
+def record_status_change(business_user_id, created_at, price, old_status, new_status, count=1):
+    """Moves count orders between status columns, revenue follows the completed status"""
+    if old_status == new_status:
+        return
+    apply_rollup_delta(business_user_id, rollup_day(created_at), _status_change_deltas(price, old_status, new_status, count))
+
+
+def record_bulk_status_change(business_user_id, orders, new_status):
+    """Same as record_status_change for many orders, deltas are merged so each touched day gets one UPDATE"""
+    buckets = {}
+    for order in orders:
+        if order.status == new_status:
+            continue
+        day_deltas = buckets.setdefault(rollup_day(order.created_at), {})
+        for name, value in _status_change_deltas(order.price, order.status, new_status).items():
+            day_deltas[name] = day_deltas.get(name, 0) + value
+    for day, deltas in sorted(buckets.items()):
+        apply_rollup_delta(business_user_id, day, deltas)
+
+
+def subtract_orders(queryset):
+    """Removes the contribution of many orders at once, one aggregate query plus one UPDATE per bucket"""
+    for values in _aggregate_orders(queryset):
+        business_user_id, day = values.pop('business_user_id'), values.pop('day')
+        apply_rollup_delta(business_user_id, day, {name: -value for name, value in values.items()})
+
+
+def _aggregate_orders(queryset):
+    status_counts = {f'{status}_count': Count('id', filter=Q(status=status)) for status in ORDER_STATUSES}
+    return (
+        queryset
+        .annotate(day=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+        .values('business_user_id', 'day')
+        .annotate(
+            order_count=Count('id'),
+            completed_revenue=Sum('price', filter=Q(status='completed'), default=Decimal('0')),
+            delivery_days_total=Sum('delivery_time_in_days', default=0),
+            **status_counts,
+        )
+        .order_by()
+    )
+
+
+@transaction.atomic
+def rebuild_rollups(business_user_ids=None):
+    """Recomputes the rollups from the orders and archived orders, returns the number of rows written"""
+    orders, archived = Order.objects.all(), ArchivedOrder.objects.all()
+    stats = BusinessDailyStats.objects.all()
+    if business_user_ids is not None:
+        orders = orders.filter(business_user_id__in=business_user_ids)
+        archived = archived.filter(business_user_id__in=business_user_ids)
+        stats = stats.filter(business_user_id__in=business_user_ids)
+    stats.delete()
+    buckets = {}
+    for queryset in (orders, archived):
+        for values in _aggregate_orders(queryset).iterator():
+            key = (values['business_user_id'], values['day'])
+            if key in buckets:
+                for name, value in values.items():
+                    if name not in ('business_user_id', 'day'):
+                        buckets[key][name] += value
+            else:
+                buckets[key] = values
+    rows = [BusinessDailyStats(**values) for values in buckets.values()]
+    BusinessDailyStats.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+    return len(rows)
+
+
+DASHBOARD_INTERVALS = ('day', 'week', 'month')
+DASHBOARD_DEFAULT_DAYS = 30
+DASHBOARD_MAX_BUCKETS = 1000
+STAT_COLUMNS = ('order_count', *(f'{status}_count' for status in ORDER_STATUSES), 'completed_revenue', 'delivery_days_total')
+
+
+def _bucket_start(day, interval):
+    if interval == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day, interval):
+    if interval == 'week':
+        return day + datetime.timedelta(days=7)
+    if interval == 'month':
+        return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return day + datetime.timedelta(days=1)
+
+
+def _point(values):
+    order_count = values['order_count']
+    return {
+        'order_count': order_count,
+        **{status: values[f'{status}_count'] for status in ORDER_STATUSES},
+        'completed_revenue': f'{values["completed_revenue"]:.2f}',
+        'avg_delivery_days': round(values['delivery_days_total'] / order_count, 1) if order_count else None,
+    }
+
+
+def dashboard_series(business_user_id, start, end, interval='day'):
+    """Zero-filled time series and totals for [start, end], read from the rollup rows only"""
+    buckets = {}
+    bucket = _bucket_start(start, interval)
+    while bucket <= end:
+        buckets[bucket] = dict.fromkeys(STAT_COLUMNS, 0)
+        if len(buckets) > DASHBOARD_MAX_BUCKETS:
+            raise ValidationError({'interval': f'Zeitraum ergibt mehr als {DASHBOARD_MAX_BUCKETS} Werte, bitte gröberes Intervall wählen.'})
+        bucket = _next_bucket(bucket, interval)
+
+    rows = (
+        BusinessDailyStats.objects
+        .filter(business_user_id=business_user_id, day__gte=start, day__lte=end)
+        .values_list('day', *STAT_COLUMNS)
+    )
+    totals = dict.fromkeys(STAT_COLUMNS, 0)
+    for day, *values in rows:
+        target = buckets[_bucket_start(day, interval)]
+        for name, value in zip(STAT_COLUMNS, values):
+            target[name] += value
+            totals[name] += value
+
+    return {
+        'created_from': start.isoformat(),
+        'created_to': end.isoformat(),
+        'interval': interval,
+        'totals': _point(totals),
+        'series': [{'date': bucket.isoformat(), **_point(values)} for bucket, values in buckets.items()],
+    }
@@ -0,0 +1,245 @@
+"""Provides the TF-IDF similar offers index, built in the background and refreshed incrementally from a per-process corpus"""
+import heapq
+import math
+import re
+import datetime
+import threading
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.utils.background import enqueue
+from coderr_app.models import Offer, OfferSimilarity
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOPWORDS = frozenset('''
+    aber als am an auch auf aus bei bin bis da das dass dem den der des die ein eine einem einen einer eines
+    es für hat ich ihr im in ist ja kann mit nach nicht noch nur oder sich sie sind so über um und uns von
+    vor wir wie zu zum zur and are as at be by for from has have in is it of on or that the this to with you your
+'''.split())
+TITLE_WEIGHT = 2
+MAX_DF_RATIO = 0.5
+MAX_DRIFT_RATIO = 0.1
+SYNC_MARGIN = datetime.timedelta(seconds=5)
+WRITE_BATCH_SIZE = 500
+
+_pending = set()
+_pending_lock = threading.Lock()
+_drain_queued = False
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def neighbours_per_offer():
+    return getattr(settings, 'SIMILAR_OFFERS_K', 10)
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords, digits and single characters"""
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if len(t) > 1 and not t.isdigit() and t not in STOPWORDS]
+
+
+def term_counts(title, description):
+    """Token counts of an offer, title tokens weigh TITLE_WEIGHT"""
+    tokens = Counter(tokenize(description))
+    for token in tokenize(title):
+        tokens[token] += TITLE_WEIGHT
+    return tokens
+
+
+class SimilarityCorpus:
+    """Sublinear TF-IDF vectors of all offers with an inverted index for sparse dot products, updatable per offer"""
+
+    def __init__(self, rows, synced_at=None):
+        self.counts = {offer_id: term_counts(title, description) for offer_id, title, description in rows}
+        self.document_frequency = Counter()
+        self.token_offers = defaultdict(set)
+        for offer_id, tokens in self.counts.items():
+            self.document_frequency.update(tokens.keys())
+            for token in tokens:
+                self.token_offers[token].add(offer_id)
+        self.vectors = {}
+        self.postings = defaultdict(dict)
+        for offer_id in self.counts:
+            self._index(offer_id)
+        self.synced_at = synced_at
+        self.changes = 0
+
+    @classmethod
+    def load(cls):
+        synced_at = timezone.now()
+        rows = Offer.objects.values_list('id', 'title', 'description').iterator(chunk_size=2000)
+        return cls(rows, synced_at)
+
+    def _included(self, token, max_df):
+        return 1 < self.document_frequency[token] <= max_df
+
+    def _max_df(self):
+        return max(2, int(len(self.counts) * MAX_DF_RATIO))
+
+    def _unindex(self, offer_id):
+        for token in self.vectors.pop(offer_id, {}):
+            self.postings[token].pop(offer_id, None)
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def _index(self, offer_id):
+        self._unindex(offer_id)
+        total = len(self.counts)
+        max_df = self._max_df()
+        vector = {
+            token: (1 + math.log(count)) * (math.log((1 + total) / (1 + self.document_frequency[token])) + 1)
+            for token, count in self.counts[offer_id].items()
+            if self._included(token, max_df)
+        }
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vector = {token: w / norm for token, w in vector.items()} if norm else {}
+        self.vectors[offer_id] = vector
+        for token, weight in vector.items():
+            self.postings[token][offer_id] = weight
+
+    def update(self, rows, removed_ids=()):
+        """Applies changed and removed offers, re-vectorizes them and the offers sharing a token that crossed the df limits"""
+        max_df = self._max_df()
+        touched = {}
+        changed = []
+        for offer_id, tokens in [(offer_id, None) for offer_id in removed_ids] + [
+            (offer_id, term_counts(title, description)) for offer_id, title, description in rows
+        ]:
+            old = self.counts.pop(offer_id, Counter())
+            new = tokens if tokens is not None else Counter()
+            for token in old.keys() ^ new.keys():
+                touched.setdefault(token, self._included(token, max_df))
+                if token in new:
+                    self.document_frequency[token] += 1
+                    self.token_offers[token].add(offer_id)
+                else:
+                    self.document_frequency[token] -= 1
+                    self.token_offers[token].discard(offer_id)
+                    if not self.token_offers[token]:
+                        del self.token_offers[token], self.document_frequency[token]
+            if tokens is None:
+                self._unindex(offer_id)
+            else:
+                self.counts[offer_id] = tokens
+                changed.append(offer_id)
+            self.changes += 1
+        max_df = self._max_df()
+        reindex = set(changed)
+        for token, was_included in touched.items():
+            if self._included(token, max_df) != was_included:
+                reindex.update(self.token_offers.get(token, ()))
+        for offer_id in reindex:
+            self._index(offer_id)
+        return reindex
+
+    def sync(self, offer_ids):
+        """Re-reads the given offers and those saved since the last sync, drops deleted ones"""
+        synced_at = timezone.now()
+        recent = Q(pk__in=offer_ids)
+        if self.synced_at is not None:
+            recent |= Q(updated_at__gte=self.synced_at - SYNC_MARGIN)
+        rows = list(Offer.objects.filter(recent).values_list('id', 'title', 'description'))
+        existing = set(Offer.objects.values_list('id', flat=True).iterator(chunk_size=2000))
+        removed = (self.counts.keys() - existing) | {offer_id for offer_id in offer_ids if offer_id not in existing}
+        self.synced_at = synced_at
+        return self.update(rows, removed)
+
+    def is_stale(self):
+        """Idf weights of untouched offers drift with every update, reload after MAX_DRIFT_RATIO of the corpus changed"""
+        return self.changes > len(self.counts) * MAX_DRIFT_RATIO
+
+    def neighbours(self, offer_id, k):
+        """Top k offers by cosine similarity as [[id, score], ...]"""
+        scores = defaultdict(float)
+        for token, weight in self.vectors.get(offer_id, {}).items():
+            for other_id, other_weight in self.postings[token].items():
+                if other_id != offer_id:
+                    scores[other_id] += weight * other_weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [[other_id, round(score, 4)] for other_id, score in best]
+
+
+def _write(rows, replace_all=False):
+    with transaction.atomic():
+        if replace_all:
+            OfferSimilarity.objects.all().delete()
+            OfferSimilarity.objects.bulk_create(rows, batch_size=WRITE_BATCH_SIZE)
+        else:
+            OfferSimilarity.objects.bulk_create(
+                rows, batch_size=WRITE_BATCH_SIZE,
+                update_conflicts=True, unique_fields=['offer'], update_fields=['neighbours', 'updated_at'],
+            )
+
+
+def rebuild_similarity_index():
+    """Recomputes the neighbours of every offer, returns the number of offers indexed"""
+    global _corpus
+    corpus = SimilarityCorpus.load()
+    k = neighbours_per_offer()
+    rows = [OfferSimilarity(offer_id=offer_id, neighbours=corpus.neighbours(offer_id, k)) for offer_id in corpus.vectors]
+    _write(rows, replace_all=True)
+    with _corpus_lock:
+        _corpus = corpus
+    return len(rows)
+
+
+def refresh_similarity(offer_ids):
+    """Updates the vectors of changed offers in the process corpus and recomputes them and the offers that listed them"""
+    global _corpus
+    offer_ids = set(offer_ids)
+    k = neighbours_per_offer()
+    with _corpus_lock:
+        if _corpus is None or _corpus.is_stale():
+            _corpus = corpus = SimilarityCorpus.load()
+            changed = offer_ids & corpus.vectors.keys()
+        else:
+            corpus = _corpus
+            changed = corpus.sync(offer_ids)
+        affected = set(changed)
+        for offer_id in changed:
+            affected.update(other_id for other_id, _score in corpus.neighbours(offer_id, k))
+        previous = OfferSimilarity.objects.filter(pk__in=offer_ids).values_list('neighbours', flat=True)
+        for neighbours in previous:
+            affected.update(other_id for other_id, _score in neighbours)
+        rows = [
+            OfferSimilarity(offer_id=offer_id, neighbours=corpus.neighbours(offer_id, k))
+            for offer_id in sorted(affected) if offer_id in corpus.vectors
+        ]
+    if rows:
+        _write(rows)
+    return len(rows)
+
+
+def _drain():
+    """Background task, processes all ids collected since the last run in one refresh"""
+    global _drain_queued
+    with _pending_lock:
+        offer_ids, _drain_queued = set(_pending), False
+        _pending.clear()
+    if offer_ids:
+        refresh_similarity(offer_ids)
+
+
+def _queue_ids(offer_ids):
+    global _drain_queued
+    with _pending_lock:
+        _pending.update(offer_ids)
+        if _drain_queued:
+            return
+        _drain_queued = True
+    enqueue(_drain)
+
+
+def schedule_similarity_refresh(offer_ids):
+    """Queues a refresh after commit, bursts of changes are coalesced into one background run"""
+    offer_ids = set(offer_ids)
+    if offer_ids:
+        transaction.on_commit(lambda: _queue_ids(offer_ids))
+
+
+def similar_offer_ids(offer_id, limit):
+    """Single primary key read of the stored neighbours"""
+    neighbours = OfferSimilarity.objects.filter(pk=offer_id).values_list('neighbours', flat=True).first()
+    return [(other_id, score) for other_id, score in (neighbours or [])[:limit]]
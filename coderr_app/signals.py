@@ -0,0 +1,72 @@
+"""Connects model signals of the marketplace to background work, search indexes and rollups"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from auth_app.models import Profile
+from coderr_app.models import Offer, OfferSimilarity, Order
+from coderr_app.queries.autocomplete_services import offer_removed, offer_title_changed
+from coderr_app.queries.image_services import schedule_image_variants
+from coderr_app.queries.rollup_services import (
+    record_order_created,
+    record_order_deleted,
+    record_status_change,
+    rollups_suspended,
+)
+from coderr_app.queries.similarity_services import schedule_similarity_refresh
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_save, sender=Profile)
+def queue_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Builds thumbnails for new uploads after commit, never inside the request"""
+    if not raw:
+        schedule_image_variants(instance, update_fields)
+
+
+@receiver(post_save, sender=Offer)
+def refresh_similar_offers(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Re-indexes the offer in the background when its text changed"""
+    if raw:
+        return
+    if created or update_fields is None or {'title', 'description'} & set(update_fields):
+        schedule_similarity_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Offer)
+def refresh_neighbours_of_deleted_offer(sender, instance, **kwargs):
+    """Offers that listed the deleted one get new neighbours, the row itself goes with the cascade"""
+    neighbours = OfferSimilarity.objects.filter(pk=instance.pk).values_list('neighbours', flat=True).first()
+    schedule_similarity_refresh(other_id for other_id, _score in neighbours or [])
+
+
+@receiver(post_save, sender=Offer)
+def update_autocomplete(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Puts new and renamed offers into the autocomplete index after commit"""
+    if raw:
+        return
+    if created or update_fields is None or 'title' in update_fields:
+        offer_title_changed(instance)
+
+
+@receiver(post_delete, sender=Offer)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    """Drops deleted offers from the autocomplete index after commit"""
+    offer_removed(instance.pk)
+
+
+@receiver(post_save, sender=Order)
+def update_order_rollups(sender, instance, created, raw=False, **kwargs):
+    """Keeps BusinessDailyStats in step with the order, inside the same transaction as the save"""
+    if raw or rollups_suspended():
+        return
+    if created:
+        record_order_created(instance)
+        return
+    old_status = instance.initial_value('status')
+    if old_status and old_status != instance.status:
+        record_status_change(instance.business_user_id, instance.created_at, instance.price, old_status, instance.status)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    if not rollups_suspended():
+        record_order_deleted(instance)
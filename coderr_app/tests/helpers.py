@@ -0,0 +1,64 @@
+"""Provides small builders for users, offers and orders shared by the test modules"""
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from coderr_app.models import Offer, OfferDetail, Order
+
+OFFER_TYPES = ('basic', 'standard', 'premium')
+
+
+def make_user(username, profile_type='customer'):
+    """Creates a user with profile type and token"""
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='Passwort-123!')
+    user.profile.type = profile_type
+    user.profile.save()
+    Token.objects.create(user=user)
+    return user
+
+
+def auth_client(user, **defaults):
+    """APIClient that sends the user's token"""
+    client = APIClient(**defaults)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+    return client
+
+
+def make_offer(user, title='Logo Design', prices=(10, 20, 30)):
+    """Creates an offer with basic, standard and premium details"""
+    offer = Offer.objects.create(user=user, title=title, description=f'{title} Beschreibung')
+    OfferDetail.objects.bulk_create([
+        OfferDetail(
+            offer=offer, title=f'{title} {offer_type}', price=Decimal(price), delivery_time=days,
+            delivery_time_in_days=days, revisions=1, features=['Entwurf'], offer_type=offer_type,
+        )
+        for offer_type, price, days in zip(OFFER_TYPES, prices, (3, 5, 7))
+    ])
+    return offer
+
+
+def make_order(customer, business, status='in_progress', price=50, offer_type='basic'):
+    """Creates an order between customer and business"""
+    return Order.objects.create(
+        customer_user=customer, business_user=business, title='Auftrag', revisions=1,
+        delivery_time_in_days=3, price=Decimal(price), features=['Entwurf'], offer_type=offer_type, status=status,
+    )
+
+
+@contextmanager
+def fail_once(target, name, message='database is locked'):
+    """Patches target.name so its first call raises a contention error, later calls run the original"""
+    original = getattr(target, name)
+    state = {'failed': False}
+
+    def side_effect(*args, **kwargs):
+        if not state['failed']:
+            state['failed'] = True
+            raise OperationalError(message)
+        return original(*args, **kwargs)
+
+    with mock.patch.object(target, name, autospec=True, side_effect=side_effect) as patched:
+        yield patched
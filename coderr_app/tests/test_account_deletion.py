@@ -0,0 +1,128 @@
+"""Tests the chunked account purge for both sides of the marketplace and resuming it after a failure"""
+import datetime
+import threading
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from auth_app.models import AccountDeletionJob
+from coderr_app.models import ArchivedOrder, BusinessDailyStats, Offer, Order, Review
+from coderr_app.queries import account_deletion
+from coderr_app.queries.order_archive import archive_orders
+from coderr_app.queries.rollup_services import STAT_COLUMNS, rebuild_rollups
+from core.utils import background
+from coderr_app.tests.helpers import auth_client, make_offer, make_order, make_user
+
+
+def rollup_rows():
+    """Non-empty buckets only, subtracting leaves zero rows behind that a rebuild does not write"""
+    return list(BusinessDailyStats.objects.exclude(order_count=0).order_by('business_user_id', 'day').values('business_user_id', 'day', *STAT_COLUMNS))
+
+
+@override_settings(ACCOUNT_DELETION_CHUNK_SIZE=2, BACKGROUND_TASKS_EAGER=True)
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        self.other_business = make_user('konkurrenz', 'business')
+        self.customer = make_user('kunde')
+        self.other_customer = make_user('kundin')
+        for title in ('Logo', 'Flyer', 'Website'):
+            make_offer(self.business, title=title)
+        make_offer(self.other_business, title='Video')
+        for status in ('in_progress', 'completed', 'completed', 'cancelled'):
+            make_order(self.customer, self.business, status=status, price=40)
+            make_order(self.customer, self.other_business, status=status, price=25)
+        make_order(self.other_customer, self.business, status='completed', price=60)
+        Order.objects.filter(status='cancelled').update(updated_at=timezone.now() - datetime.timedelta(days=400))
+        archive_orders()
+        Review.objects.create(business_user=self.business, reviewer=self.customer, rating=5)
+        Review.objects.create(business_user=self.other_business, reviewer=self.customer, rating=4)
+        Review.objects.create(business_user=self.business, reviewer=self.other_customer, rating=3)
+
+    def delete_account(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = auth_client(user).delete('/api/account/')
+        self.assertEqual(response.status_code, 202)
+        return AccountDeletionJob.objects.get(pk=response.data['job_id'])
+
+    def assert_rollups_consistent(self):
+        rows = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(rows, rollup_rows())
+
+    def test_customer_purge_updates_counterpart_rollups(self):
+        job = self.delete_account(self.customer)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress, {
+            'reviews': 2, 'customer_orders': 6, 'customer_archived_orders': 2, 'account': 1,
+        })
+        self.assertFalse(User.objects.filter(pk=self.customer.pk).exists())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(ArchivedOrder.objects.exists())
+        self.assertEqual(Review.objects.count(), 1)
+        self.assert_rollups_consistent()
+        stats = BusinessDailyStats.objects.get(business_user=self.business)
+        self.assertEqual((stats.order_count, stats.completed_count, stats.completed_revenue), (1, 1, 60))
+
+    def test_business_purge_removes_offers_orders_and_stats(self):
+        job = self.delete_account(self.business)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress['offers'], 3)
+        self.assertEqual(job.progress['business_orders'], 4)
+        self.assertEqual(job.progress['business_archived_orders'], 1)
+        self.assertFalse(Offer.objects.filter(user_id=self.business.pk).exists())
+        self.assertFalse(Order.objects.filter(business_user_id=self.business.pk).exists())
+        self.assertFalse(BusinessDailyStats.objects.filter(business_user_id=self.business.pk).exists())
+        self.assertEqual(Order.objects.filter(customer_user=self.customer).count(), 3)
+        self.assert_rollups_consistent()
+
+    def test_login_is_disabled_before_the_purge(self):
+        with mock.patch.object(account_deletion, 'enqueue_on_commit') as enqueue:
+            auth_client(self.customer).delete('/api/account/')
+        job = AccountDeletionJob.objects.get()
+        enqueue.assert_called_once_with(account_deletion.run_account_deletion, job.pk, queue_name=account_deletion.PURGE_QUEUE)
+        self.assertFalse(User.objects.get(pk=self.customer.pk).is_active)
+        self.assertEqual(auth_client(self.customer).get('/api/orders/').status_code, 401)
+
+    def test_resume_continues_at_failed_step(self):
+        original = account_deletion._delete_chunk
+        calls = {'customer_orders': 0}
+
+        def fail_in_orders(step, account_id, size):
+            if step == 'customer_orders':
+                calls[step] += 1
+                if calls[step] == 2:
+                    raise RuntimeError('Verbindung verloren')
+            return original(step, account_id, size)
+
+        with mock.patch.object(account_deletion, '_delete_chunk', side_effect=fail_in_orders):
+            with self.assertRaisesMessage(RuntimeError, 'Verbindung verloren'):
+                self.delete_account(self.customer)
+        job = AccountDeletionJob.objects.get(account_id=self.customer.pk)
+        self.assertEqual((job.status, job.stage, job.error), ('failed', 'customer_orders', 'Verbindung verloren'))
+        self.assertEqual(job.progress, {'reviews': 2, 'customer_orders': 2})
+        self.assert_rollups_consistent()
+
+        call_command('resume_account_deletions', stdout=open('/dev/null', 'w'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress, {
+            'reviews': 2, 'customer_orders': 6, 'customer_archived_orders': 2, 'account': 1,
+        })
+        self.assertFalse(User.objects.filter(pk=self.customer.pk).exists())
+        self.assert_rollups_consistent()
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=False)
+class BackgroundQueueTests(TestCase):
+    def test_slow_purge_queue_does_not_block_default_queue(self):
+        release, done = threading.Event(), threading.Event()
+        background.enqueue(release.wait, 5, queue_name=account_deletion.PURGE_QUEUE)
+        background.enqueue(done.set)
+        try:
+            self.assertTrue(done.wait(2))
+        finally:
+            release.set()
+        background.wait_for_background_tasks()
+        self.assertEqual(background._workers[account_deletion.PURGE_QUEUE].name, 'coderr-background-account-purge')
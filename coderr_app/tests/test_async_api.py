@@ -0,0 +1,37 @@
+"""Tests authentication of the async API views for anonymous and token requests"""
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncClient, AsyncRequestFactory, TestCase
+from coderr_app.tests.helpers import make_user
+from core.utils.async_api import async_api_view
+
+
+@async_api_view()
+async def whoami(request):
+    return {'authenticated': request.user.is_authenticated, 'anonymous': isinstance(request.user, AnonymousUser)}
+
+
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        self.user = make_user('kunde')
+
+    async def call(self, **headers):
+        request = AsyncRequestFactory().get('/', headers=headers)
+
+        async def auser():
+            return AnonymousUser()
+        request.auser = auser
+        return await whoami(request)
+
+    async def test_anonymous_request_keeps_anonymous_user(self):
+        response = await self.call()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"authenticated":false,"anonymous":true}')
+
+    async def test_token_request_sets_user(self):
+        response = await self.call(Authorization=f'Token {self.user.auth_token.key}')
+        self.assertEqual(response.content, b'{"authenticated":true,"anonymous":false}')
+
+    async def test_authenticated_view_rejects_anonymous_user(self):
+        response = await AsyncClient().get('/api/async/order-count/1/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
@@ -0,0 +1,62 @@
+"""Tests ranking, warm-up and cache setup of the offer autocomplete index"""
+from unittest import mock
+from django.test import TestCase
+from coderr_app.queries import autocomplete_services
+from coderr_app.queries.autocomplete_services import PrefixIndex, check_shared_cache, warm_autocomplete_index
+from coderr_app.tests.helpers import make_offer, make_user
+
+
+class PrefixIndexTests(TestCase):
+    def setUp(self):
+        rows = [(i, f'Design Paket {i:03d}', 0) for i in range(1, 301)]
+        self.index = PrefixIndex(rows + [(999, 'Zeichnung Design', 50)])
+
+    def ids(self, query, limit=3):
+        return [item['id'] for item in self.index.search(query, limit)]
+
+    def test_ranks_whole_prefix_range(self):
+        self.index.add(500, 'Design Zukunft', 80)
+        self.assertEqual(self.ids('design'), [500, 1, 2])
+        self.assertEqual(self.ids('des'), [500, 1, 2])
+        self.assertEqual(self.ids('zeichnung'), [999])
+
+    def test_cached_short_prefix_follows_changes(self):
+        self.assertEqual(self.ids('de'), [1, 2, 3])
+        self.index.add(500, 'Design Zukunft', 80)
+        self.assertEqual(self.ids('de'), [500, 1, 2])
+        self.index.remove(500)
+        self.index.add(2, 'Design Paket 002', 90)
+        self.assertEqual(self.ids('de'), [2, 1, 3])
+
+
+    def test_changes_update_ranked_prefixes_without_rescanning(self):
+        self.ids('desi')
+        with mock.patch.object(PrefixIndex, '_scan', side_effect=AssertionError('range scanned')):
+            self.index.add(500, 'Design Zukunft', 80)
+            self.index.add(7, 'Design Paket 007', 60)
+            self.index.remove(999)
+            self.index.remove(1)
+            results = {query: self.index.search(query, 5) for query in ('d', 'des', 'desi', 'z')}
+        fresh = self.fresh()
+        self.assertEqual(results, {query: fresh.search(query, 5) for query in results})
+        self.assertEqual([item['id'] for item in results['desi'][:3]], [500, 7, 2])
+
+    def fresh(self):
+        return PrefixIndex((offer_id, title, views) for offer_id, (title, views, _normalized) in self.index.offers.items())
+
+
+class AutocompleteStartupTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(autocomplete_services, '_state', autocomplete_services._State())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warm_up_builds_index(self):
+        offer = make_offer(make_user('anbieter', 'business'), title='Logo Design')
+        warm_autocomplete_index()
+        with self.assertNumQueries(0):
+            results = autocomplete_services.get_autocomplete_index().search('logo', 5)
+        self.assertEqual(results, [{'id': offer.pk, 'title': 'Logo Design'}])
+
+    def test_deploy_check_warns_about_per_process_cache(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ['coderr.W002'])
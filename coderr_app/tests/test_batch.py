@@ -0,0 +1,34 @@
+"""Tests /api/batch/ with sync and async sub-requests under every kind of authentication"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+from coderr_app.tests.helpers import auth_client, make_user
+
+SUB_REQUESTS = [
+    {'path': '/api/base-info/'},
+    {'path': '/api/async/base-info/'},
+    {'path': '/api/order-count/{business}/'},
+    {'path': '/api/async/order-count/{business}/'},
+]
+
+
+class BatchAuthenticationTests(TestCase):
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        self.customer = make_user('kunde')
+
+    def statuses(self, client):
+        requests = [{'path': item['path'].format(business=self.business.pk)} for item in SUB_REQUESTS]
+        response = client.post('/api/batch/', {'requests': requests}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [result['status'] for result in response.data['responses']]
+
+    def test_anonymous(self):
+        self.assertEqual(self.statuses(APIClient()), [200, 200, 401, 401])
+
+    def test_session(self):
+        client = APIClient()
+        client.force_login(self.customer)
+        self.assertEqual(self.statuses(client), [200, 200, 200, 200])
+
+    def test_token(self):
+        self.assertEqual(self.statuses(auth_client(self.customer)), [200, 200, 200, 200])
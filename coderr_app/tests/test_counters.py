@@ -0,0 +1,53 @@
+"""Tests the buffered offer view counter and its chunked flush"""
+from unittest import mock
+from django.db import OperationalError
+from django.test import TestCase
+from coderr_app.models import Offer
+from coderr_app.queries.offer_views import offer_view_counter
+from coderr_app.tests.helpers import auth_client, make_offer, make_user
+from core.utils import counters
+from core.utils.counters import BufferedCounter
+
+
+class OfferViewCounterTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(BufferedCounter, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(offer_view_counter._pending.clear)
+        business = make_user('anbieter', 'business')
+        self.offers = [make_offer(business, title=f'Angebot {i}') for i in range(5)]
+
+    def views(self):
+        return list(Offer.objects.order_by('pk').values_list('views', flat=True))
+
+    def test_views_are_buffered_until_flush(self):
+        client = auth_client(make_user('kunde'))
+        for offer in (self.offers[1], self.offers[1], self.offers[3]):
+            self.assertEqual(client.get(f'/api/offers/{offer.pk}/').status_code, 200)
+        self.assertEqual(self.views(), [0, 0, 0, 0, 0])
+        self.assertEqual(offer_view_counter.flush(), 2)
+        self.assertEqual(self.views(), [0, 2, 0, 1, 0])
+        ids = [offer['id'] for offer in client.get('/api/offers/', {'ordering': 'popular'}).data['results']]
+        self.assertEqual(ids[:2], [self.offers[1].pk, self.offers[3].pk])
+
+    def test_failed_chunk_is_kept_and_written_chunks_are_not_repeated(self):
+        for i, offer in enumerate(self.offers):
+            offer_view_counter.increment(offer.pk, i + 1)
+        original = BufferedCounter._write
+        calls = []
+
+        def second_chunk_fails(counter, items):
+            calls.append(items)
+            if len(calls) == 2:
+                raise OperationalError('disk I/O error')
+            return original(counter, items)
+
+        with mock.patch.object(counters, 'FLUSH_BATCH_SIZE', 2), \
+                mock.patch.object(BufferedCounter, '_write', autospec=True, side_effect=second_chunk_fails):
+            self.assertEqual(offer_view_counter.flush(), 2)
+            self.assertEqual(self.views(), [1, 2, 0, 0, 0])
+            self.assertEqual(offer_view_counter.pending(), {offer.pk: i + 1 for i, offer in enumerate(self.offers) if i >= 2})
+            self.assertEqual(offer_view_counter.flush(), 3)
+        self.assertEqual(self.views(), [1, 2, 3, 4, 5])
+        self.assertEqual(offer_view_counter.pending(), {})
@@ -0,0 +1,37 @@
+"""Tests authentication of the order event stream with signed tickets"""
+from unittest import mock
+from django.test import AsyncClient, TestCase
+from coderr_app.tests.helpers import auth_client, make_user
+from core.utils.async_api import issue_stream_ticket
+
+
+class OrderEventTicketTests(TestCase):
+    def setUp(self):
+        self.user = make_user('kunde')
+
+    async def stream_status(self, query):
+        response = await AsyncClient().get('/api/events/orders/', query)
+        if response.streaming:
+            stream = aiter(response.streaming_content)
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+            await stream.aclose()
+        return response.status_code
+
+    def test_ticket_endpoint_requires_token(self):
+        response = auth_client(self.user).post('/api/events/ticket/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual(response.data['expires_in'], 60)
+        self.assertNotIn(self.user.auth_token.key, response.data['ticket'])
+
+    async def test_ticket_opens_stream(self):
+        self.assertEqual(await self.stream_status({'ticket': issue_stream_ticket(self.user)}), 200)
+
+    async def test_api_token_in_url_is_rejected(self):
+        self.assertEqual(await self.stream_status({'token': self.user.auth_token.key}), 401)
+
+    async def test_tampered_and_expired_tickets_are_rejected(self):
+        ticket = issue_stream_ticket(self.user)
+        self.assertEqual(await self.stream_status({'ticket': ticket[:-1] + ('A' if ticket[-1] != 'A' else 'B')}), 401)
+        with mock.patch('django.core.signing.time.time', return_value=10 ** 10):
+            self.assertEqual(await self.stream_status({'ticket': ticket}), 401)
@@ -0,0 +1,76 @@
+"""Tests Idempotency-Key handling on order creation: replay, conflicts, expiry and atomic storage"""
+import datetime
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from coderr_app.models import IdempotencyKey, Order
+from coderr_app.tests.helpers import auth_client, make_offer, make_user
+from core.utils import idempotency
+
+KEY = 'bestellung-1'
+
+
+class IdempotentOrderCreateTests(TestCase):
+    def setUp(self):
+        self.customer = make_user('kunde')
+        self.detail = make_offer(make_user('anbieter', 'business')).details.get(offer_type='basic')
+        self.client = auth_client(self.customer)
+
+    def post(self, detail_id=None, key=KEY):
+        return self.client.post(
+            '/api/orders/', {'offer_detail_id': detail_id or self.detail.pk}, format='json', headers={'Idempotency-Key': key},
+        )
+
+    def pending_key(self, age_seconds=0):
+        now = timezone.now()
+        request = SimpleNamespace(method='POST', path='/api/orders/', data={'offer_detail_id': self.detail.pk})
+        record = IdempotencyKey.objects.create(
+            user=self.customer, key=KEY, fingerprint=idempotency.request_fingerprint(request),
+            expires_at=now + datetime.timedelta(hours=1),
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=now - datetime.timedelta(seconds=age_seconds))
+        return record
+
+    def test_retry_replays_stored_response(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((second.status_code, second.data), (201, first.data))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_other_request_is_rejected(self):
+        self.post()
+        other = self.detail.offer.details.get(offer_type='premium')
+        self.assertEqual(self.post(other.pk).status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_request_in_flight_conflicts(self):
+        self.pending_key()
+        self.assertEqual(self.post().status_code, 409)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_abandoned_claim_is_taken_over(self):
+        self.pending_key(age_seconds=120)
+        self.assertEqual(self.post().status_code, 201)
+
+    def test_expired_key_runs_again(self):
+        self.post()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_errors_release_the_key(self):
+        self.assertEqual(self.post(detail_id=999999).status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_create_is_rolled_back_when_response_cannot_be_stored(self):
+        with mock.patch.object(idempotency, 'store_response', side_effect=RuntimeError('process died')):
+            self.assertEqual(self.post().status_code, 500)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
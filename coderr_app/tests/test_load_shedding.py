@@ -0,0 +1,58 @@
+"""Tests that only verified credentials lift low-priority requests above the shedding threshold"""
+from unittest import mock
+from django.conf import settings
+from django.test import AsyncClient, TestCase
+from rest_framework.test import APIClient
+from core.utils import load_shedding
+from coderr_app.tests.helpers import auth_client, make_user
+
+
+class LoadSheddingPriorityTests(TestCase):
+    def setUp(self):
+        self.user = make_user('kunde')
+        self.overload(1.5)
+
+    def overload(self, load):
+        patcher = mock.patch.object(load_shedding.monitor, 'load', return_value=load)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_anonymous_low_priority_is_shed(self):
+        response = APIClient().get('/api/base-info/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+    def test_unknown_token_is_shed(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + 'f' * 40)
+        self.assertEqual(client.get('/api/base-info/').status_code, 503)
+
+    def test_unknown_session_cookie_is_shed(self):
+        client = APIClient()
+        client.cookies[settings.SESSION_COOKIE_NAME] = 'erfunden'
+        self.assertEqual(client.get('/api/base-info/').status_code, 503)
+
+    def test_inactive_users_token_is_shed(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(auth_client(self.user).get('/api/base-info/').status_code, 503)
+
+    def test_valid_token_and_session_pass(self):
+        self.assertEqual(auth_client(self.user).get('/api/base-info/').status_code, 200)
+        client = APIClient()
+        client.force_login(self.user)
+        self.assertEqual(client.get('/api/base-info/').status_code, 200)
+
+    def test_credentials_not_checked_below_threshold_or_under_heavy_load(self):
+        with mock.patch.object(load_shedding, 'has_valid_credentials') as check:
+            self.assertEqual(auth_client(self.user).get(f'/api/order-count/{self.user.pk}/').status_code, 404)
+            self.overload(2.5)
+            self.assertEqual(auth_client(self.user).get('/api/base-info/').status_code, 503)
+        check.assert_not_called()
+
+    async def test_async_view_verifies_token(self):
+        url = '/api/async/base-info/'
+        response = await AsyncClient().get(url, headers={'Authorization': 'Token ' + 'f' * 40})
+        self.assertEqual(response.status_code, 503)
+        response = await AsyncClient().get(url, headers={'Authorization': f'Token {self.user.auth_token.key}'})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,75 @@
+"""Tests the media view: conditional requests, byte ranges and streaming without buffering under ASGI"""
+import os
+import tempfile
+from django.test import AsyncClient, TestCase, override_settings
+from core.utils import media
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class MediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        os.makedirs(os.path.join(self.media_root.name, 'offers'))
+        for name in ('logo.png', 'logo-0123456789ab.webp'):
+            with open(os.path.join(self.media_root.name, 'offers', name), 'wb') as handle:
+                handle.write(CONTENT)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name, MEDIA_SENDFILE=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_full_file_with_validators_and_304(self):
+        response = self.client.get('/media/offers/logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        response = self.client.get('/media/offers/logo.png', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        hashed = self.client.get('/media/offers/logo-0123456789ab.webp')
+        self.assertEqual(hashed['Cache-Control'], media.IMMUTABLE_CACHE_CONTROL)
+
+    def test_byte_ranges(self):
+        response = self.client.get('/media/offers/logo.png', headers={'Range': 'bytes=100-299'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '200')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:300])
+        suffix = self.client.get('/media/offers/logo.png', headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(suffix.streaming_content), CONTENT[-10:])
+        unsatisfiable = self.client.get('/media/offers/logo.png', headers={'Range': f'bytes={len(CONTENT)}-'})
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get('/media/offers/logo.png', headers={'Range': 'bytes=0-9', 'If-Range': '"veraltet"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_path_outside_media_root_is_404(self):
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/offers/fehlt.png').status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_sendfile_hand_off(self):
+        response = self.client.get('/media/offers/logo.png', headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/offers/logo.png')
+        self.assertEqual(response.content, b'')
+
+    async def test_asgi_range_is_streamed_asynchronously(self):
+        response = await AsyncClient().get('/media/offers/logo.png', headers={'Range': f'bytes=10-{10 + 3 * media.STREAM_BLOCK_SIZE}'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b''.join(chunks), CONTENT[10:11 + 3 * media.STREAM_BLOCK_SIZE])
+
+    async def test_asgi_full_file_is_streamed_asynchronously(self):
+        response = await AsyncClient().get('/media/offers/logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="logo.png"')
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), CONTENT)
@@ -0,0 +1,76 @@
+"""Tests offer create and update through the API, including retries after lock contention"""
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from coderr_app.models import Offer, OfferDetail
+from coderr_app.tests.helpers import auth_client, fail_once, make_offer, make_user
+
+
+def offer_payload(title='Logo Design'):
+    return {
+        'title': title,
+        'description': 'Logos aller Art',
+        'details': [
+            {'title': t, 'revisions': 1, 'delivery_time_in_days': d, 'price': p, 'features': ['Entwurf'], 'offer_type': t}
+            for t, d, p in (('basic', 3, 10), ('standard', 5, 20), ('premium', 7, 30))
+        ],
+    }
+
+
+@override_settings(DB_WRITE_RETRY={'BASE_DELAY': 0.001, 'MAX_DELAY': 0.001}, BACKGROUND_TASKS_EAGER=True)
+class OfferWriteRetryTests(TransactionTestCase):
+    """Runs outside a test transaction so retry_on_contention really retries"""
+
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        self.client = auth_client(self.business)
+
+    def test_create_retries_with_details(self):
+        with fail_once(Offer.objects, 'create') as create:
+            response = self.client.post('/api/offers/', offer_payload(), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(create.call_count, 2)
+        offer = Offer.objects.get()
+        self.assertEqual(sorted(offer.details.values_list('offer_type', flat=True)), ['basic', 'premium', 'standard'])
+
+    def test_update_retry_writes_details(self):
+        offer = make_offer(self.business)
+        with fail_once(OfferDetail.objects, 'bulk_update') as bulk_update:
+            response = self.client.patch(
+                f'/api/offers/{offer.pk}/', {'details': [{'offer_type': 'basic', 'price': 99}]}, format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(bulk_update.call_count, 2)
+        basic = next(d for d in response.data['details'] if d['offer_type'] == 'basic')
+        self.assertEqual(basic['price'], '99.00')
+        self.assertEqual(offer.details.get(offer_type='basic').price, Decimal('99.00'))
+
+    def test_update_retry_after_failed_offer_save(self):
+        offer = make_offer(self.business)
+        with fail_once(Offer, 'save_base'):
+            response = self.client.patch(
+                f'/api/offers/{offer.pk}/', {'title': 'Neu', 'details': [{'offer_type': 'basic', 'price': 99}]}, format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        offer.refresh_from_db()
+        self.assertEqual(offer.title, 'Neu')
+        self.assertEqual(offer.details.get(offer_type='basic').price, Decimal('99.00'))
+
+
+class OfferUpdateQueryTests(TestCase):
+    def test_three_tier_price_patch_is_batched(self):
+        business = make_user('anbieter', 'business')
+        offer = make_offer(business)
+        client = auth_client(business)
+        details = [{'offer_type': t, 'price': p} for t, p in (('basic', 11), ('standard', 22), ('premium', 33))]
+        # token, offer, prefetched details, one CASE UPDATE for all details, offer updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(f'/api/offers/{offer.pk}/', {'details': details}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(queries), 5, '\n'.join(q['sql'] for q in queries))
+        detail_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "coderr_app_offerdetail"')]
+        self.assertEqual(len(detail_updates), 1)
+        self.assertIn('CASE', detail_updates[0])
+        prices = dict(OfferDetail.objects.filter(offer=offer).values_list('offer_type', 'price'))
+        self.assertEqual(prices, {'basic': Decimal('11.00'), 'standard': Decimal('22.00'), 'premium': Decimal('33.00')})
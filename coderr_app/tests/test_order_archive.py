@@ -0,0 +1,94 @@
+"""Tests archiving of finished orders and the include_archived opt-in on the order endpoints"""
+import datetime
+import json
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from coderr_app.models import ArchivedOrder, BusinessDailyStats, Order
+from coderr_app.queries.order_archive import archive_batch, archive_cutoff, archive_orders
+from coderr_app.queries.rollup_services import STAT_COLUMNS, rebuild_rollups
+from coderr_app.tests.helpers import auth_client, make_order, make_user
+
+
+def rollup_rows():
+    return list(BusinessDailyStats.objects.order_by('business_user_id', 'day').values('business_user_id', 'day', *STAT_COLUMNS))
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        self.customer = make_user('kunde')
+        self.old_completed = make_order(self.customer, self.business, status='completed', price=40)
+        self.old_cancelled = make_order(self.customer, self.business, status='cancelled', price=20)
+        self.old_open = make_order(self.customer, self.business, status='in_progress', price=30)
+        self.recent_completed = make_order(self.customer, self.business, status='completed', price=10)
+        old = timezone.now() - datetime.timedelta(days=400)
+        Order.objects.exclude(pk=self.recent_completed.pk).update(updated_at=old)
+        self.rollups_before = rollup_rows()
+        self.moved = archive_orders()
+
+    def test_moves_only_old_finished_orders(self):
+        self.assertEqual(self.moved, 2)
+        self.assertEqual(
+            set(ArchivedOrder.objects.values_list('pk', flat=True)), {self.old_completed.pk, self.old_cancelled.pk}
+        )
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {self.old_open.pk, self.recent_completed.pk})
+
+    def test_archive_batch_is_idempotent(self):
+        cutoff = archive_cutoff()
+        self.assertEqual(archive_batch(cutoff, 10), 0)
+        self.assertEqual(archive_orders(), 0)
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+        self.assertEqual(rollup_rows(), self.rollups_before)
+
+    def test_rollups_keep_archived_orders(self):
+        self.assertEqual(rollup_rows(), self.rollups_before)
+        rebuild_rollups()
+        self.assertEqual(rollup_rows(), self.rollups_before)
+
+    def test_order_list_includes_archived_on_request(self):
+        client = auth_client(self.customer)
+        self.assertEqual(len(client.get('/api/orders/').data), 2)
+        response = client.get('/api/orders/', {'include_archived': '1'})
+        self.assertEqual([order['id'] for order in response.data], [
+            self.recent_completed.pk, self.old_open.pk, self.old_cancelled.pk, self.old_completed.pk,
+        ])
+        self.assertEqual(response.data[-1]['status'], 'completed')
+
+    def test_sparse_order_list_with_archived(self):
+        response = auth_client(self.customer).get('/api/orders/', {'include_archived': 'true', 'fields': 'id,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0], {'id': self.recent_completed.pk, 'status': 'completed'})
+        self.assertEqual(len(response.data), 4)
+
+    def test_completed_count_includes_archived_on_request(self):
+        client = auth_client(self.customer)
+        url = f'/api/completed-order-count/{self.business.pk}/'
+        self.assertEqual(client.get(url).data, {'completed_order_count': 1})
+        self.assertEqual(client.get(url, {'include_archived': '1'}).data, {'completed_order_count': 2})
+
+    async def test_async_completed_count_includes_archived_on_request(self):
+        headers = {'Authorization': f'Token {self.customer.auth_token.key}'}
+        url = f'/api/async/completed-order-count/{self.business.pk}/'
+        response = await AsyncClient().get(url, headers=headers)
+        self.assertEqual(response.json(), {'completed_order_count': 1})
+        response = await AsyncClient().get(url, {'include_archived': '1'}, headers=headers)
+        self.assertEqual(response.json(), {'completed_order_count': 2})
+
+    def test_export_includes_archived_on_request(self):
+        client = auth_client(self.business)
+
+        def exported_ids(**params):
+            response = client.get('/api/orders/export/', params)
+            return [json.loads(line)['id'] for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(exported_ids(), [self.old_open.pk, self.recent_completed.pk])
+        self.assertEqual(exported_ids(include_archived='1'), [
+            self.old_completed.pk, self.old_cancelled.pk, self.old_open.pk, self.recent_completed.pk,
+        ])
+
+    def test_dashboard_counts_archived_orders(self):
+        totals = auth_client(self.business).get('/api/dashboard/').data['totals']
+        self.assertEqual(totals['order_count'], 4)
+        self.assertEqual(totals['completed'], 2)
+        self.assertEqual(totals['cancelled'], 1)
+        self.assertEqual(totals['completed_revenue'], '50.00')
@@ -0,0 +1,70 @@
+"""Tests the bulk order status endpoint: ownership, per-id results and rollup deltas"""
+import datetime
+from django.test import TestCase
+from django.utils import timezone
+from coderr_app.models import BusinessDailyStats, Order
+from coderr_app.queries.order_services import bulk_update_order_status
+from coderr_app.queries.rollup_services import STAT_COLUMNS, rebuild_rollups
+from coderr_app.tests.helpers import auth_client, make_order, make_user
+
+URL = '/api/orders/bulk-status/'
+
+
+def rollup_rows():
+    return list(BusinessDailyStats.objects.order_by('business_user_id', 'day').values('business_user_id', 'day', *STAT_COLUMNS))
+
+
+class OrderBulkStatusTests(TestCase):
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        self.other_business = make_user('konkurrenz', 'business')
+        self.customer = make_user('kunde')
+        self.open = make_order(self.customer, self.business, status='in_progress', price=40)
+        self.completed = make_order(self.customer, self.business, status='completed', price=30)
+        self.earlier = make_order(self.customer, self.business, status='delivered', price=25)
+        self.foreign = make_order(self.customer, self.other_business, status='in_progress', price=99)
+        Order.objects.filter(pk=self.earlier.pk).update(created_at=timezone.now() - datetime.timedelta(days=3))
+        rebuild_rollups()
+
+    def patch(self, ids, new_status, user=None):
+        return auth_client(user or self.business).patch(URL, {'ids': ids, 'status': new_status}, format='json')
+
+    def test_results_per_id_in_input_order(self):
+        response = self.patch([self.open.pk, self.completed.pk, self.foreign.pk, 9999, self.open.pk], 'completed')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual([(r['id'], r['result']) for r in response.data['results']], [
+            (self.open.pk, 'updated'),
+            (self.completed.pk, 'unchanged'),
+            (self.foreign.pk, 'forbidden'),
+            (9999, 'not_found'),
+        ])
+        self.assertEqual(response.data['results'][0]['previous_status'], 'in_progress')
+
+    def test_only_own_orders_change(self):
+        self.patch([self.open.pk, self.foreign.pk], 'cancelled')
+        self.assertEqual(Order.objects.get(pk=self.open.pk).status, 'cancelled')
+        self.assertEqual(Order.objects.get(pk=self.foreign.pk).status, 'in_progress')
+
+    def test_rollup_deltas_match_rebuild(self):
+        self.patch([self.open.pk, self.completed.pk, self.earlier.pk], 'cancelled')
+        self.patch([self.open.pk, self.earlier.pk], 'completed')
+        after_deltas = rollup_rows()
+        self.assertEqual(rebuild_rollups(), 3)
+        self.assertEqual(after_deltas, rollup_rows())
+        totals = BusinessDailyStats.objects.filter(business_user=self.business).values_list('completed_revenue', flat=True)
+        self.assertEqual(sum(totals), 65)
+
+    def test_forbidden_for_customers(self):
+        response = self.patch([self.open.pk], 'completed', user=self.customer)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Order.objects.get(pk=self.open.pk).status, 'in_progress')
+
+    def test_invalid_status_and_empty_ids(self):
+        self.assertEqual(self.patch([self.open.pk], 'done').status_code, 400)
+        self.assertEqual(self.patch([], 'completed').status_code, 400)
+
+    def test_one_order_update_and_one_rollup_update_per_day(self):
+        with self.assertNumQueries(1 + 1 + 2):
+            results = bulk_update_order_status(self.business, [self.open.pk, self.earlier.pk], 'completed')
+        self.assertEqual([r['result'] for r in results], ['updated', 'updated'])
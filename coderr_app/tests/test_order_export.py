@@ -0,0 +1,37 @@
+"""Tests that the order export streams chunk by chunk under WSGI and ASGI"""
+import json
+from unittest import mock
+from django.test import AsyncClient, TestCase, override_settings
+from coderr_app.queries import order_export
+from coderr_app.tests.helpers import auth_client, make_order, make_user
+
+
+@override_settings(ORDER_EXPORT_CHUNK_SIZE=2)
+class OrderExportStreamingTests(TestCase):
+    def setUp(self):
+        self.business = make_user('anbieter', 'business')
+        customer = make_user('kunde')
+        self.orders = [make_order(customer, self.business, price=10 + i) for i in range(5)]
+
+    def test_wsgi_streams_one_block_per_chunk(self):
+        response = auth_client(self.business).get('/api/orders/export/', {'export_format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith('id,customer_user,business_user'))
+        self.assertEqual(sum(chunk.count('\n') for chunk in chunks[1:]), 5)
+
+    async def test_asgi_streams_async_and_fetches_lazily(self):
+        headers = {'Authorization': f'Token {self.business.auth_token.key}'}
+        with mock.patch.object(order_export, '_fetch_chunk', wraps=order_export._fetch_chunk) as fetch:
+            response = await AsyncClient().get('/api/orders/export/', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            stream = aiter(response.streaming_content)
+            first = await anext(stream)
+            self.assertEqual(fetch.call_count, 1)
+            chunks = [first] + [chunk async for chunk in stream]
+        self.assertEqual([len(chunk.decode().splitlines()) for chunk in chunks], [2, 2, 1])
+        ids = [json.loads(line)['id'] for chunk in chunks for line in chunk.decode().splitlines()]
+        self.assertEqual(ids, [order.id for order in self.orders])
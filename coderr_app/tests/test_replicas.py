@@ -0,0 +1,98 @@
+"""Tests read routing against a real second SQLite file kept in sync with sync_sqlite_replicas"""
+import os
+import tempfile
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from coderr_app.models import Offer
+from coderr_app.queries.offer_views import offer_view_counter
+from coderr_app.tests.helpers import auth_client, make_offer, make_user
+from core.utils.db_router import STICKY_COOKIE_NAME, check_sticky_cache, replica_routing_middleware, sync_sqlite_replicas
+
+REPLICA_ALIAS = 'replica_test'
+
+
+class SQLiteReplicaTestCase(TransactionTestCase):
+    """Registers a file based replica next to the test database, synced before every test and by sync_replica()"""
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        connections.settings[REPLICA_ALIAS] = {
+            **connections.settings[DEFAULT_DB_ALIAS],
+            'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        cls.addClassCleanup(cls._remove_replica)
+        cls.enterClassContext(override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS]))
+        super().setUpClass()
+
+    @classmethod
+    def _remove_replica(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(offer_view_counter.flush)
+        self.sync_replica()
+
+    def sync_replica(self):
+        self.assertEqual(sync_sqlite_replicas(), [REPLICA_ALIAS])
+
+
+class ReplicaRoutingTests(SQLiteReplicaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.business = make_user('anbieter', 'business')
+        self.customer = make_user('kunde')
+        self.offer = make_offer(self.business, title='Alt')
+        self.sync_replica()
+
+    def get_title(self, client):
+        response = client.get(f'/api/offers/{self.offer.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['title']
+
+    def test_safe_reads_use_replica_until_synced(self):
+        Offer.objects.filter(pk=self.offer.pk).update(title='Neu')
+        client = auth_client(self.customer)
+        self.assertEqual(self.get_title(client), 'Alt')
+        self.sync_replica()
+        self.assertEqual(self.get_title(client), 'Neu')
+
+    def test_writer_reads_own_write_from_primary(self):
+        writer = auth_client(self.business)
+        response = writer.patch(f'/api/offers/{self.offer.pk}/', {'title': 'Neu'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_title(writer), 'Neu')
+        self.assertEqual(self.get_title(auth_client(self.customer)), 'Alt')
+
+    def test_sticky_cookie_covers_requests_without_credentials(self):
+        client = APIClient()
+        response = client.post('/api/registration/', {
+            'username': 'neu', 'email': 'neu@example.com', 'password': 'Passwort-123!',
+            'repeated_password': 'Passwort-123!', 'type': 'customer',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[STICKY_COOKIE_NAME]['max-age'], 5)
+        Offer.objects.filter(pk=self.offer.pk).update(title='Neu')
+        client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        self.assertEqual(self.get_title(client), 'Neu')
+        self.assertEqual(self.get_title(auth_client(self.customer)), 'Alt')
+
+
+class ReplicaConfigurationTests(SQLiteReplicaTestCase):
+    def test_middleware_unused_without_replicas(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            with self.assertRaises(MiddlewareNotUsed):
+                replica_routing_middleware(lambda request: None)
+
+    def test_check_warns_about_per_process_cache(self):
+        self.assertEqual([w.id for w in check_sticky_cache(None)], ['coderr.W001'])
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_sticky_cache(None), [])
@@ -0,0 +1,51 @@
+"""Tests the incremental refresh of the similar offers index"""
+from unittest import mock
+from django.test import TestCase
+from coderr_app.models import Offer, OfferSimilarity
+from coderr_app.queries import similarity_services
+from coderr_app.queries.similarity_services import SimilarityCorpus, rebuild_similarity_index, refresh_similarity
+from coderr_app.tests.helpers import make_user
+
+TOPICS = ['logo design', 'website shop', 'video schnitt', 'foto retusche', 'musik mixing']
+
+
+class SimilarityRefreshTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(similarity_services, '_corpus', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        business = make_user('anbieter', 'business')
+        self.offers = Offer.objects.bulk_create(
+            Offer(user=business, title=f'{TOPICS[i % 5]} paket', description=f'{TOPICS[i % 5]} professionell')
+            for i in range(30)
+        )
+        rebuild_similarity_index()
+
+    def neighbour_ids(self, offer):
+        return [other_id for other_id, _score in OfferSimilarity.objects.get(pk=offer.pk).neighbours]
+
+    def test_refresh_updates_changed_offer_without_reloading(self):
+        first, second = self.offers[0], self.offers[1]
+        first.title = second.title = 'zebra muster'
+        first.save()
+        second.save()
+        with mock.patch.object(SimilarityCorpus, 'load', side_effect=AssertionError('corpus reloaded')):
+            refresh_similarity([first.pk])
+        self.assertEqual(self.neighbour_ids(first)[0], second.pk)
+        self.assertEqual(self.neighbour_ids(second)[0], first.pk)
+
+    def test_deleted_offer_leaves_neighbour_lists(self):
+        deleted = self.offers[0]
+        listed_by = [offer for offer in self.offers if deleted.pk in self.neighbour_ids(offer)]
+        self.assertTrue(listed_by)
+        Offer.objects.filter(pk=deleted.pk).delete()
+        refresh_similarity([offer.pk for offer in listed_by])
+        for offer in listed_by:
+            self.assertNotIn(deleted.pk, self.neighbour_ids(offer))
+
+    def test_stale_corpus_is_reloaded(self):
+        with mock.patch.object(similarity_services, 'MAX_DRIFT_RATIO', 0), \
+                mock.patch.object(SimilarityCorpus, 'load', wraps=SimilarityCorpus.load) as load:
+            refresh_similarity([self.offers[0].pk])
+            refresh_similarity([self.offers[0].pk])
+        self.assertEqual(load.call_count, 1)
@@ -0,0 +1,46 @@
+"""Tests the token bucket throttles on login, anonymous offer browsing and the async views"""
+from unittest import mock
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from coderr_app.tests.helpers import make_user
+from core.utils import throttling
+
+RATES = {'login.ip': '20/min', 'login.username': '5/min', 'offers.anon': '2/min', 'offers.user': '300/min'}
+
+
+@override_settings(THROTTLE_RATES=RATES, THROTTLE_BACKEND='local')
+class ThrottleTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(throttling, '_store', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user('kunde')
+
+    def login(self, password, address='10.0.0.1'):
+        return APIClient(REMOTE_ADDR=address).post(
+            '/api/login/', {'username': 'kunde', 'password': password}, format='json',
+        )
+
+    def test_wrong_passwords_are_limited_per_username_and_address(self):
+        for _attempt in range(5):
+            self.assertEqual(self.login('falsch').status_code, 400)
+        response = self.login('Passwort-123!')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertTrue(response.data['detail'].startswith('Zu viele Anfragen'))
+        self.assertEqual(self.login('Passwort-123!', address='10.0.0.2').status_code, 200)
+
+    def test_anonymous_offer_list_is_limited(self):
+        client = APIClient()
+        self.assertEqual([client.get('/api/offers/').status_code for _i in range(3)], [200, 200, 429])
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}')
+        self.assertEqual(client.get('/api/offers/').status_code, 200)
+
+    async def test_async_offer_list_returns_429(self):
+        client = AsyncClient()
+        statuses = [(await client.get('/api/async/offers/')).status_code for _i in range(2)]
+        response = await client.get('/api/async/offers/')
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertTrue(response.json()['detail'].startswith('Zu viele Anfragen'))
@@ -0,0 +1,61 @@
+"""Tests that change tracking snapshots lazily and saves only modified columns"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from coderr_app.models import Offer, Order
+from coderr_app.tests.helpers import make_offer, make_order, make_user
+
+
+class ChangeTrackingTests(TestCase):
+    def setUp(self):
+        make_order(make_user('kunde'), make_user('anbieter', 'business'))
+
+    def test_loading_takes_no_snapshot(self):
+        order = Order.objects.get()
+        self.assertNotIn('_loaded_values', order.__dict__)
+        self.assertEqual(order.changed_fields(), [])
+
+    def test_save_writes_only_changed_columns(self):
+        order = Order.objects.get()
+        order.features = [*order.features, 'Quelldateien']
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"features"', queries[0]['sql'])
+        self.assertNotIn('"title"', queries[0]['sql'])
+        order.refresh_from_db()
+        self.assertEqual(order.features, ['Entwurf', 'Quelldateien'])
+
+    def test_noop_save_is_skipped(self):
+        order = Order.objects.get()
+        order.status = order.status
+        with self.assertNumQueries(0):
+            order.save()
+
+    def test_initial_value_survives_until_save(self):
+        order = Order.objects.get()
+        order.status = 'completed'
+        self.assertEqual(order.initial_value('status'), 'in_progress')
+        order.save()
+        self.assertEqual(order.initial_value('status'), 'completed')
+
+    def test_fields_left_out_of_update_fields_stay_dirty(self):
+        offer = make_offer(make_user('anbieter2', 'business'))
+        offer = Offer.objects.get(pk=offer.pk)
+        offer.title = 'Neuer Titel'
+        offer.description = 'Neue Beschreibung'
+        offer.save(update_fields=['description'])
+        self.assertEqual(offer.changed_fields(), ['title'])
+        offer.save()
+        offer.refresh_from_db()
+        self.assertEqual((offer.title, offer.description), ('Neuer Titel', 'Neue Beschreibung'))
+
+    def test_in_place_json_change_is_saved(self):
+        order = Order.objects.get()
+        order.features.append('Quelldateien')
+        with self.assertNumQueries(1):
+            order.save()
+        order.features.append('Lizenz')
+        order.save()
+        order.refresh_from_db()
+        self.assertEqual(order.features, ['Entwurf', 'Quelldateien', 'Lizenz'])
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Build the in-process autocomplete index before the worker takes requests
+from coderr_app.queries.autocomplete_services import warm_autocomplete_index  # noqa: E402
+
+warm_autocomplete_index()
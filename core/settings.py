@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 import logging
 from logging.handlers import RotatingFileHandler
+from core.utils.sqlite import apply_sqlite_production_profile
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / 'logs'
@@ -60,7 +61,9 @@ REST_FRAMEWORK = {
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.utils.load_shedding.load_shedding_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.utils.db_router.replica_routing_middleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -70,6 +73,78 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'core.urls'
 
+# Maximale Anzahl Teilanfragen pro /api/batch/-Aufruf
+BATCH_MAX_REQUESTS = 20
+
+# Maximale Anzahl Angebote pro Bulk-Import über die API
+OFFER_BULK_MAX_ITEMS = 500
+
+# Server-Sent Events (nur ASGI): Backend für Pub/Sub, Heartbeat-Intervall und maximale Streamdauer
+EVENTS_BACKEND = 'core.utils.events.InProcessEventBackend'
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = 300
+SSE_QUEUE_SIZE = 100
+# EventSource kann keinen Authorization-Header senden: POST events/ticket/ liefert ein signiertes Ticket für
+# ?ticket=, das so viele Sekunden gilt (der API-Token landet so nie in URLs und Logs)
+SSE_TICKET_MAX_AGE = 60
+
+# Aufrufzähler (z.B. Offer.views) sammeln im Speicher und schreiben alle N Sekunden gebündelt, 0 = sofort
+COUNTER_FLUSH_SECONDS = 10
+
+# Anzahl gespeicherter ähnlicher Angebote pro Angebot (offers/<id>/similar/)
+SIMILAR_OFFERS_K = 10
+
+# Vorschläge pro Anfrage bei offers/autocomplete/ (Standard und Maximum)
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+
+# Wie oft (Sekunden) ein Worker die Index-Version im Cache prüft; mehrere Worker brauchen einen geteilten Cache
+# (CODERR_REDIS_URL), mit LocMem sieht jeder Worker nur seine eigenen Änderungen (check --deploy warnt)
+AUTOCOMPLETE_VERSION_CHECK_SECONDS = 1
+
+# Zeilen pro Transaktion beim Hintergrund-Löschen eines Kontos (DELETE /api/account/)
+ACCOUNT_DELETION_CHUNK_SIZE = 500
+
+# Abgeschlossene/stornierte Bestellungen wandern nach so vielen Tagen ohne Änderung ins Archiv (archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = 365
+ORDER_ARCHIVE_BATCH_SIZE = 1000
+
+# Maximale Anzahl Bestellungen pro Anfrage an orders/bulk-status/
+ORDER_BULK_STATUS_MAX_IDS = 500
+
+# Idempotency-Key: gespeicherte Antworten gelten so viele Sekunden; eine laufende Anfrage gilt nach
+# IDEMPOTENCY_LOCK_SECONDS als abgebrochen (purge_idempotency_keys löscht abgelaufene Einträge)
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+# Rate-Limits als Token-Bucket pro Endpunkt und Identität ('<scope>.<identität>': 'Anzahl/Zeitraum');
+# Identitäten: ip, anon (nur ohne Login), user, token, username (Login, pro Name und Adresse). Fehlender Eintrag = kein Limit.
+# THROTTLE_BACKEND 'local' zählt pro Prozess, 'cache' über den gemeinsamen Cache aller Worker
+THROTTLE_BACKEND = os.getenv('CODERR_THROTTLE_BACKEND', 'local')
+THROTTLE_LOCAL_MAX_KEYS = 100_000
+THROTTLE_RATES = {
+    'offers.anon': '60/min',
+    'offers.user': '300/min',
+    'base-info.anon': '60/min',
+    'base-info.user': '300/min',
+    'login.ip': '20/min',
+    'login.username': '5/min',
+    'registration.ip': '10/hour',
+}
+
+# Lastabwurf pro Worker: über dem Ziel (laufende Anfragen, EWMA-Latenz oder Wartezeit laut X-Request-Start)
+# bekommen Views mit load_priority 'low' ohne gültiges Token bzw. Login sofort 503, ab doppelter Last auch 'normal'; 'critical' nie
+LOAD_SHEDDING = {
+    'ENABLED': os.getenv('CODERR_LOAD_SHEDDING', '1') == '1',
+    'MAX_IN_FLIGHT': 64,
+    'LATENCY_TARGET': 0.5,
+    'QUEUE_TARGET': 0.2,
+    'RETRY_AFTER': 2,
+}
+
+# Zeilen pro Datenbank-Chunk beim Streaming-Export von Bestellungen
+ORDER_EXPORT_CHUNK_SIZE = 2000
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -98,6 +173,38 @@ DATABASES = {
     }
 }
 
+# Optionale Read-Replicas, z. B. CODERR_DB_REPLICAS="replica1.sqlite3,replica2.sqlite3"
+DATABASE_REPLICAS = []
+for index, replica_path in enumerate(filter(None, os.environ.get('CODERR_DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / replica_path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.utils.db_router.ReadReplicaRouter']
+
+# SQLite-Produktionsprofil (WAL, Pragmas, persistente Verbindungen): CODERR_DB_PROFILE=production
+if os.environ.get('CODERR_DB_PROFILE') == 'production':
+    for database in DATABASES.values():
+        apply_sqlite_production_profile(database)
+
+# Sekunden, die ein Client nach einem Schreibzugriff auf der Primary-DB bleibt (read-your-own-writes);
+# erkannt am Token bzw. an der Session und am kurzlebigen Cookie coderr_primary, nie an der IP-Adresse
+REPLICA_STICKY_SECONDS = 5
+
+# Cache: ohne CODERR_REDIS_URL hat jeder Prozess seinen eigenen LocMem-Cache. Mit mehreren Workern braucht es einen
+# gemeinsamen Cache, sonst gelten Sticky-Reads der Replicas, die Autocomplete-Version und THROTTLE_BACKEND='cache'
+# nur pro Prozess (manage.py check warnt bei Replicas ohne gemeinsamen Cache; RedisCache benötigt das Paket redis)
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+if os.environ.get('CODERR_REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CODERR_REDIS_URL'],
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,6 +253,29 @@ MEDIA_ROOT = BASE_DIR / 'media'   # ergibt <projekt>/media
 # URL-Präfix, unter dem Uploads erreichbar sind
 MEDIA_URL = '/media/'
 
+# Auslieferung von Uploads durch Django (auch ohne DEBUG). MEDIA_SENDFILE = 'x-sendfile' oder
+# 'x-accel-redirect' übergibt das Senden an Apache/nginx (dort MEDIA_ACCEL_PREFIX als internal location)
+SERVE_MEDIA = True
+MEDIA_SENDFILE = os.environ.get('CODERR_MEDIA_SENDFILE') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_SECONDS = 3600
+
+# Verkleinerte Bildvarianten (WebP + JPEG), die im Hintergrund aus Uploads erzeugt werden
+IMAGE_VARIANTS = {
+    'thumb': {'size': (320, 320), 'quality': 80},
+    'medium': {'size': (960, 960), 'quality': 82},
+}
+
+# Maximale Upload-Größe pro Endpunkt in Bytes, zu große oder fremde Dateien werden früh abgewiesen
+UPLOAD_LIMITS = {
+    'default': 5 * 1024 * 1024,
+    'offer_image': 5 * 1024 * 1024,
+    'profile_file': 2 * 1024 * 1024,
+}
+
+# True führt Hintergrundaufgaben sofort im aufrufenden Thread aus (z.B. für Skripte)
+BACKGROUND_TASKS_EAGER = os.environ.get('CODERR_BACKGROUND_EAGER') == '1'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -0,0 +1,117 @@
+"""Provides a small async counterpart of DRF's APIView for native async read endpoints"""
+import functools
+import logging
+import math
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.http import HttpResponse, HttpResponseBase
+from rest_framework import exceptions, status
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from core.utils.throttling import check_throttles, throttled_message
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEYWORD = b'token'
+STREAM_TICKET_SALT = 'coderr.stream-ticket'
+
+
+def stream_ticket_signer():
+    return signing.TimestampSigner(salt=STREAM_TICKET_SALT)
+
+
+def issue_stream_ticket(user):
+    """Short-lived signed ticket for URLs that cannot carry headers (EventSource), keeps the API token out of logs"""
+    return stream_ticket_signer().sign(str(user.pk))
+
+
+async def _ticket_user(ticket):
+    try:
+        user_id = stream_ticket_signer().unsign(ticket, max_age=getattr(settings, 'SSE_TICKET_MAX_AGE', 60))
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid or expired ticket.')
+    user = await User.objects.filter(pk=user_id).afirst()
+    if user is None or not user.is_active:
+        raise exceptions.AuthenticationFailed('User inactive or deleted.')
+    return user
+
+
+async def aauthenticate(request, query_ticket=False):
+    """Resolves the user from the token header, a signed ?ticket= (where headers are impossible) or the session,
+    AnonymousUser when none of them identifies one, like request.user in DRF views"""
+    auth = get_authorization_header(request).split()
+    key = None
+    if auth and auth[0].lower() == TOKEN_KEYWORD:
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+    elif query_ticket and request.GET.get('ticket'):
+        return await _ticket_user(request.GET['ticket'])
+    if key:
+        token = await Token.objects.select_related('user').filter(key=key).afirst()
+        if token is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token.user
+
+    return await request.auser()
+
+
+def render_json(data, status_code=status.HTTP_200_OK, headers=None):
+    """Renders data exactly like DRF's JSONRenderer so async and sync endpoints stay byte-compatible"""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json',
+        headers=headers,
+    )
+
+
+def async_api_view(methods=('GET',), authenticated=False, query_ticket=False, throttle_scope=None, throttle_classes=(),
+                   load_priority='normal'):
+    """Wraps an async view with method check, token/session auth, throttling and DRF-style error responses"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return render_json(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status.HTTP_405_METHOD_NOT_ALLOWED,
+                    headers={'Allow': ', '.join(methods)},
+                )
+            try:
+                request.user = await aauthenticate(request, query_ticket)
+                if authenticated and not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                wait = check_throttles(request, throttle_scope, throttle_classes) if throttle_classes else None
+                if wait is not None:
+                    raise exceptions.Throttled(wait)
+                data = await func(request, *args, **kwargs)
+            except (exceptions.NotAuthenticated, exceptions.AuthenticationFailed) as exc:
+                return render_json(
+                    {'detail': exc.detail},
+                    status.HTTP_401_UNAUTHORIZED,
+                    headers={'WWW-Authenticate': 'Token'},
+                )
+            except exceptions.Throttled as exc:
+                return render_json(
+                    {'detail': throttled_message(exc.wait)},
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={'Retry-After': str(math.ceil(exc.wait or 1))},
+                )
+            except exceptions.APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+                return render_json(detail, exc.status_code)
+            except Exception:
+                logger.exception('Unexpected error in async view %s', func.__name__)
+                return render_json({'detail': 'Internal Server Error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return data if isinstance(data, HttpResponseBase) else render_json(data)
+        wrapper.load_priority = load_priority
+        return wrapper
+    return decorator
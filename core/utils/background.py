@@ -0,0 +1,71 @@
+"""Provides in-process background workers, one per named queue, so slow work (e.g. image decoding) never runs in request threads"""
+import atexit
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+
+_queues = {}
+_workers = {}
+_worker_lock = threading.Lock()
+
+
+def _run(func, args, kwargs):
+    """Executes one task with fresh database connections and logs failures instead of killing the worker"""
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        connections.close_all()
+
+
+def _work(tasks):
+    while True:
+        item = tasks.get()
+        try:
+            _run(*item)
+        finally:
+            tasks.task_done()
+
+
+def _ensure_worker(queue_name):
+    """One worker thread per queue, so long jobs on one queue never hold up the others"""
+    with _worker_lock:
+        tasks = _queues.setdefault(queue_name, queue.Queue())
+        worker = _workers.get(queue_name)
+        if worker is None or not worker.is_alive():
+            name = 'coderr-background' if queue_name == DEFAULT_QUEUE else f'coderr-background-{queue_name}'
+            worker = _workers[queue_name] = threading.Thread(target=_work, args=(tasks,), name=name, daemon=True)
+            worker.start()
+        return tasks
+
+
+def enqueue(func, *args, queue_name=DEFAULT_QUEUE, **kwargs):
+    """Queues func for the queue's worker thread, runs it inline when BACKGROUND_TASKS_EAGER is set (commands, scripts)"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    _ensure_worker(queue_name).put((func, args, kwargs))
+
+
+def enqueue_on_commit(func, *args, using=DEFAULT_DB_ALIAS, queue_name=DEFAULT_QUEUE, **kwargs):
+    """Queues func once the surrounding transaction committed, so the worker sees the saved row"""
+    transaction.on_commit(lambda: enqueue(func, *args, queue_name=queue_name, **kwargs), using=using)
+
+
+def wait_for_background_tasks():
+    """Blocks until every queued task is done, used by commands and on shutdown"""
+    for queue_name, tasks in list(_queues.items()):
+        worker = _workers.get(queue_name)
+        if worker is not None and worker.is_alive():
+            tasks.join()
+
+
+atexit.register(wait_for_background_tasks)
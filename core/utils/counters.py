@@ -0,0 +1,90 @@
+"""Provides buffered counters that collect increments in memory and flush them as one batched UPDATE"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from core.utils import metrics
+from core.utils.retry import retry_on_contention
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+class BufferedCounter:
+    """Adds n to a counter column per primary key, persisted every COUNTER_FLUSH_SECONDS or on shutdown"""
+
+    def __init__(self, model_label, field_name):
+        self.model_label = model_label
+        self.field_name = field_name
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flusher = None
+        atexit.register(self.flush)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'COUNTER_FLUSH_SECONDS', 10)
+
+    def increment(self, pk, n=1):
+        """Only touches process memory, the request never writes"""
+        with self._lock:
+            self._pending[pk] += n
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run, name=f'counter-flush-{self.field_name}', daemon=True)
+                self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Writes all pending deltas chunk by chunk, chunks the database refused are put back so none is lost or doubled"""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+        items = sorted(batch.items())
+        flushed = 0
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            chunk = items[start:start + FLUSH_BATCH_SIZE]
+            try:
+                self._write(chunk)
+            except Exception:
+                unwritten = dict(items[start:])
+                logger.exception('Flushing %s.%s failed, keeping %d deltas', self.model_label, self.field_name, len(unwritten))
+                with self._lock:
+                    self._pending.update(unwritten)
+                break
+            flushed += len(chunk)
+            metrics.increment(f'counter.{self.field_name}.flushed', sum(n for _pk, n in chunk))
+        return flushed
+
+    @retry_on_contention('counter_flush')
+    def _write(self, items):
+        """One UPDATE ... SET field = field + CASE pk WHEN .. THEN n END for the whole chunk"""
+        model = apps.get_model(self.model_label)
+        delta = Case(*(When(pk=pk, then=Value(n)) for pk, n in items), default=Value(0), output_field=PositiveIntegerField())
+        model.objects.filter(pk__in=[pk for pk, _n in items]).update(**{self.field_name: F(self.field_name) + delta})
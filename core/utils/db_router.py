@@ -0,0 +1,170 @@
+"""Routes safe-method reads to read replicas while keeping writes and read-your-own-writes on primary"""
+import hashlib
+import random
+import sqlite3
+from contextlib import closing
+from contextvars import ContextVar
+from dataclasses import dataclass
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY_PREFIX = 'db-sticky:'
+STICKY_COOKIE_NAME = 'coderr_primary'
+
+
+@dataclass
+class RoutingState:
+    """Request scoped routing decision, flipped to primary as soon as anything is written"""
+    primary: bool = False
+    wrote: bool = False
+    sticky: bool = False
+
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    """Returns the configured replica aliases"""
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def pin_to_primary():
+    """Forces all further reads of the current request to the primary database"""
+    state = _routing_state.get()
+    if state is not None:
+        state.primary = True
+
+
+def release_to_replicas():
+    """Lets a read-only POST (e.g. a GET-only batch) use replicas unless it wrote or is sticky"""
+    state = _routing_state.get()
+    if state is not None:
+        state.primary = state.wrote or state.sticky
+
+
+class ReadReplicaRouter:
+    """Sends reads to a random replica unless the request is pinned, every write goes to primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        replicas = replica_aliases()
+        if state is None or state.primary or not replicas:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.primary = True
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _sticky_keys(request):
+    """Identifies the client by auth header or session, never by address, which proxies and NAT share"""
+    identities = [request.META.get('HTTP_AUTHORIZATION'), request.COOKIES.get(settings.SESSION_COOKIE_NAME)]
+    return [
+        STICKY_KEY_PREFIX + hashlib.sha1(identity.encode()).hexdigest()
+        for identity in identities if identity
+    ]
+
+
+def _open_sticky_window(response, sticky_seconds):
+    """Cookie for clients without credentials yet, e.g. the request right after registration or login"""
+    response.set_cookie(STICKY_COOKIE_NAME, '1', max_age=sticky_seconds, httponly=True, samesite='Lax')
+
+
+def _initial_state(request, sticky):
+    """Unsafe methods and clients inside their sticky window start on primary"""
+    sticky = sticky or STICKY_COOKIE_NAME in request.COOKIES
+    return RoutingState(primary=request.method not in SAFE_METHODS or sticky, sticky=sticky)
+
+
+def replica_routing_middleware(get_response):
+    """Installs the routing state per request and opens a sticky window after writes, unused without replicas"""
+    if not replica_aliases():
+        raise MiddlewareNotUsed
+    sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            keys = _sticky_keys(request)
+            sticky = bool(keys) and bool(await cache.aget_many(keys))
+            state = _initial_state(request, sticky)
+            token = _routing_state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _routing_state.reset(token)
+            if state.wrote:
+                if keys:
+                    await cache.aset_many(dict.fromkeys(keys, True), sticky_seconds)
+                _open_sticky_window(response, sticky_seconds)
+            return response
+        markcoroutinefunction(middleware)
+    else:
+        def middleware(request):
+            keys = _sticky_keys(request)
+            sticky = bool(keys) and bool(cache.get_many(keys))
+            state = _initial_state(request, sticky)
+            token = _routing_state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                _routing_state.reset(token)
+            if state.wrote:
+                if keys:
+                    cache.set_many(dict.fromkeys(keys, True), sticky_seconds)
+                _open_sticky_window(response, sticky_seconds)
+            return response
+    return middleware
+
+
+replica_routing_middleware.sync_capable = True
+replica_routing_middleware.async_capable = True
+
+
+@checks.register(checks.Tags.caches)
+def check_sticky_cache(app_configs, **kwargs):
+    """Sticky windows live in the default cache, a per-process cache breaks read-your-own-writes across workers"""
+    if replica_aliases() and isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return [checks.Warning(
+            'DATABASE_REPLICAS is set but the default cache is a per-process LocMemCache.',
+            hint='Configure a shared cache (CODERR_REDIS_URL) when running more than one worker, otherwise a read '
+                 'after a write can hit a replica that has not caught up.',
+            id='coderr.W001',
+        )]
+    return []
+
+
+def sync_sqlite_replicas(aliases=None):
+    """Copies the primary SQLite file into each replica, stands in for real replication locally and in tests"""
+    source = connections[DEFAULT_DB_ALIAS]
+    if source.vendor != 'sqlite':
+        raise RuntimeError('sync_sqlite_replicas only supports SQLite databases.')
+    source.ensure_connection()
+    synced = []
+    for alias in aliases or replica_aliases():
+        target = connections[alias]
+        target.close()
+        with closing(sqlite3.connect(str(target.settings_dict['NAME']))) as destination:
+            source.connection.backup(destination)
+        synced.append(alias)
+    return synced
@@ -0,0 +1,101 @@
+"""Provides a publish/subscribe hub with a pluggable backend for pushing events to open SSE streams"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_EVENTS_BACKEND = 'core.utils.events.InProcessEventBackend'
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+class Subscription:
+    """Queue of one stream, fed thread-safely from any publishing thread into the stream's event loop"""
+
+    def __init__(self, backend, channel, maxsize):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self.backend.unsubscribe(self)
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Next event or None after timeout (used for heartbeats)"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class InProcessEventBackend:
+    """Delivers events to streams of the same process, enough for a single ASGI worker; swap via EVENTS_BACKEND"""
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channel, maxsize=100):
+        subscription = Subscription(self, channel, maxsize)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event):
+        event = {**event, 'id': next(self._ids)}
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return len(subscribers)
+
+
+def get_event_backend():
+    """Returns the process wide backend configured by settings.EVENTS_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(getattr(settings, 'EVENTS_BACKEND', DEFAULT_EVENTS_BACKEND))()
+        return _backend
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish(channel, event):
+    """Sends an event immediately, prefer publish_on_commit for events about database writes"""
+    return get_event_backend().publish(channel, event)
+
+
+def publish_on_commit(channels, event, using=DEFAULT_DB_ALIAS):
+    """Sends the event once the surrounding transaction committed, rolled back or retried writes publish nothing"""
+    def send():
+        for channel in channels:
+            publish(channel, event)
+    transaction.on_commit(send, using=using)
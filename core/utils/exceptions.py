@@ -1,7 +1,9 @@
 """Provides custom exception handling for project"""
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import exceptions, status
+from core.utils.retry import is_contention_error
+from core.utils.throttling import throttled_message
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,17 @@ def exception_handler_status500(exc, context):
     """Custom DRF exceptions handling and HTTP codes for predictable API responses"""
     response = exception_handler(exc, context)
 
+    if response is not None and isinstance(exc, exceptions.Throttled):
+        response.data = {'detail': throttled_message(exc.wait)}
+
+    if response is None and is_contention_error(exc):
+        logger.warning('Database contention, retry budget exhausted: %s', str(exc))
+        return Response(
+            {'detail': 'Datenbank ist ausgelastet, bitte erneut versuchen.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '1'},
+        )
+
     if response is None:
         logger.error('Unexpected error: %s', str(exc))
         return Response({'detail': 'Internal Server Error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,117 @@
+"""Provides Idempotency-Key support for create endpoints, retried requests get the stored response instead of a second write"""
+import datetime
+import hashlib
+import json
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from coderr_app.models import IdempotencyKey
+from core.utils import metrics
+from core.utils.retry import retry_on_contention
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+KEY_MAX_LENGTH = 255
+PURGE_BATCH_SIZE = 1000
+
+
+def key_ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', 24 * 60 * 60))
+
+
+def lock_timeout():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60))
+
+
+def request_fingerprint(request):
+    """Hash of method, path and parsed body, a key reused for a different request is rejected"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _error(message, status_code):
+    return Response({'detail': message}, status=status_code)
+
+
+def claim_key(user, key, fingerprint):
+    """Returns (record, None) when this request may run, or (None, response) to answer right away"""
+    now = timezone.now()
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None:
+        abandoned = record.status_code is None and record.created_at < now - lock_timeout()
+        if record.expires_at <= now or abandoned:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            record = None
+    if record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint, expires_at=now + key_ttl()), None
+        except IntegrityError:
+            return None, _error('Eine Anfrage mit diesem Idempotency-Key wird noch verarbeitet.', status.HTTP_409_CONFLICT)
+    if record.fingerprint != fingerprint:
+        return None, _error('Idempotency-Key wurde bereits für eine andere Anfrage verwendet.', status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if record.status_code is None:
+        return None, _error('Eine Anfrage mit diesem Idempotency-Key wird noch verarbeitet.', status.HTTP_409_CONFLICT)
+    metrics.increment('idempotency.replayed')
+    return None, Response(record.response, status=record.status_code, headers={REPLAY_HEADER: 'true'})
+
+
+def store_response(record, response):
+    """Keeps a successful response for replay, called inside the transaction of the create"""
+    IdempotencyKey.objects.filter(pk=record.pk).update(status_code=response.status_code, response=response.data)
+
+
+def release_key(record):
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def purge_expired_keys(batch_size=PURGE_BATCH_SIZE):
+    """Deletes expired keys in bounded batches, returns the number removed"""
+    total = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+
+
+class IdempotentCreateMixin:
+    """Runs POST at most once per Idempotency-Key and user, retries within the TTL replay the stored response
+
+    The claim is committed first, the create and the stored response then commit together, so a crash in
+    between leaves neither. Only successful responses are stored, any error releases the key for a retry.
+    """
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return super().post(request, *args, **kwargs)
+        if len(key) > KEY_MAX_LENGTH:
+            raise ValidationError({IDEMPOTENCY_HEADER: f'Darf höchstens {KEY_MAX_LENGTH} Zeichen lang sein.'})
+        record, response = claim_key(request.user, key, request_fingerprint(request))
+        if response is not None:
+            return response
+        create = super().post
+
+        @retry_on_contention('idempotent_create')
+        def create_and_store():
+            with transaction.atomic():
+                response = create(request, *args, **kwargs)
+                if status.is_success(response.status_code) and hasattr(response, 'data'):
+                    store_response(record, response)
+            return response
+
+        try:
+            response = create_and_store()
+        except Exception:
+            release_key(record)
+            raise
+        if not status.is_success(response.status_code):
+            release_key(record)
+        return response
@@ -0,0 +1,65 @@
+"""Provides resized WebP/JPEG variants of uploaded images with content-hashed, cacheable names"""
+import hashlib
+import io
+import os
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+DEFAULT_IMAGE_VARIANTS = {
+    'thumb': {'size': (320, 320), 'quality': 80},
+    'medium': {'size': (960, 960), 'quality': 82},
+}
+VARIANT_FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+
+
+def image_variant_specs():
+    """Returns the configured variant sizes, overridable via settings.IMAGE_VARIANTS"""
+    return getattr(settings, 'IMAGE_VARIANTS', DEFAULT_IMAGE_VARIANTS)
+
+
+def _encode(image, fmt, quality):
+    buffer = io.BytesIO()
+    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    image.save(buffer, format=fmt, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_image_variants(field_file):
+    """Decodes the stored original once and writes every configured variant, returns {name: {format: path}}"""
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original = source.read()
+    digest = hashlib.sha1(original).hexdigest()[:12]
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+
+    with Image.open(io.BytesIO(original)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for name, spec in image_variant_specs().items():
+        resized = image.copy()
+        resized.thumbnail(tuple(spec['size']), Image.Resampling.LANCZOS)
+        variants[name] = {}
+        for extension, fmt in VARIANT_FORMATS:
+            path = os.path.join(directory, 'variants', f'{stem}-{name}-{digest}.{extension}')
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(_encode(resized, fmt, spec.get('quality', 80))))
+            variants[name][extension] = path
+    return variants
+
+
+def delete_image_variants(storage, variants, keep=None):
+    """Removes variant files that are no longer referenced"""
+    keep_paths = {path for formats in (keep or {}).values() for path in formats.values()}
+    for formats in (variants or {}).values():
+        for path in formats.values():
+            if path not in keep_paths and storage.exists(path):
+                storage.delete(path)
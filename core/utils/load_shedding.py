@@ -0,0 +1,221 @@
+"""Provides adaptive load shedding: under overload low-priority requests get an early 503 instead of queueing"""
+import threading
+import time
+from importlib import import_module
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from core.utils import metrics
+
+DEFAULT_LOAD_SHEDDING = {
+    'ENABLED': True,
+    'MAX_IN_FLIGHT': 64,
+    'LATENCY_TARGET': 0.5,
+    'QUEUE_TARGET': 0.2,
+    'EWMA_ALPHA': 0.1,
+    'HALF_LIFE': 5.0,
+    'RETRY_AFTER': 2,
+}
+# Load factor above which a priority is shed, critical requests are never shed
+SHED_THRESHOLDS = {'low': 1.0, 'normal': 2.0, 'critical': None}
+DEFAULT_PRIORITY = 'normal'
+# Low-priority requests of authenticated users are shed like this priority
+AUTHENTICATED_PRIORITY = 'normal'
+MAX_QUEUE_SECONDS = 60 * 60
+
+_config = None
+
+
+def load_shedding_config():
+    """LOAD_SHEDDING merged into the defaults, cached until the setting changes"""
+    global _config
+    if _config is None:
+        _config = {**DEFAULT_LOAD_SHEDDING, **getattr(settings, 'LOAD_SHEDDING', {})}
+    return _config
+
+
+@receiver(setting_changed)
+def _reset_config(setting, **kwargs):
+    global _config
+    if setting == 'LOAD_SHEDDING':
+        _config = None
+
+
+class DecayingAverage:
+    """EWMA per sample that also fades towards zero while no samples arrive"""
+
+    def __init__(self):
+        self.value = 0.0
+        self.stamp = None
+
+    def current(self, now, half_life):
+        if self.stamp is None:
+            return 0.0
+        return self.value * 0.5 ** (max(0.0, now - self.stamp) / half_life)
+
+    def add(self, sample, now, alpha, half_life):
+        value = self.current(now, half_life)
+        self.value = sample if self.stamp is None else value + alpha * (sample - value)
+        self.stamp = now
+
+
+class LoadMonitor:
+    """Per-worker view of the load: requests in flight, recent latency and recent queueing before Django"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = DecayingAverage()
+        self.queue_time = DecayingAverage()
+        self._lock = threading.Lock()
+
+    def begin(self, queue_seconds):
+        config = load_shedding_config()
+        with self._lock:
+            self.in_flight += 1
+            if queue_seconds is not None:
+                self.queue_time.add(queue_seconds, time.monotonic(), config['EWMA_ALPHA'], config['HALF_LIFE'])
+
+    def end(self, started, shed=False):
+        config = load_shedding_config()
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if not shed:
+                self.latency.add(now - started, now, config['EWMA_ALPHA'], config['HALF_LIFE'])
+
+    def load(self):
+        """1.0 means one of in-flight, latency or queue time is at its target"""
+        config = load_shedding_config()
+        now = time.monotonic()
+        with self._lock:
+            return max(
+                (self.in_flight - 1) / config['MAX_IN_FLIGHT'],
+                self.latency.current(now, config['HALF_LIFE']) / config['LATENCY_TARGET'],
+                self.queue_time.current(now, config['HALF_LIFE']) / config['QUEUE_TARGET'],
+            )
+
+
+monitor = LoadMonitor()
+
+
+def queue_seconds(request, now=None):
+    """Time spent before Django from X-Request-Start ('t=<epoch>' in s, ms or us), None if absent or implausible"""
+    raw = request.META.get('HTTP_X_REQUEST_START', '')
+    raw = raw[2:] if raw.startswith('t=') else raw
+    try:
+        start = float(raw)
+    except ValueError:
+        return None
+    if start > 1e14:
+        start /= 1e6
+    elif start > 1e11:
+        start /= 1e3
+    waited = (time.time() if now is None else now) - start
+    return waited if 0 <= waited <= MAX_QUEUE_SECONDS else None
+
+
+def request_priority(request):
+    """load_priority of the resolved view ('low', 'normal', 'critical', or a dict per method)"""
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return DEFAULT_PRIORITY
+    view = getattr(match.func, 'view_class', match.func)
+    priority = getattr(view, 'load_priority', DEFAULT_PRIORITY)
+    if isinstance(priority, dict):
+        priority = priority.get(request.method, DEFAULT_PRIORITY)
+    return priority
+
+
+def has_valid_credentials(request):
+    """True for a known token of an active user or a logged-in session, a bare header or cookie is not enough"""
+    auth = get_authorization_header(request).split()
+    if len(auth) == 2 and auth[0].lower() == b'token':
+        key = auth[1].decode('latin-1')
+        return Token.objects.filter(key=key, user__is_active=True).exists()
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        user_id = import_module(settings.SESSION_ENGINE).SessionStore(session_key).get(SESSION_KEY)
+        return user_id is not None and User.objects.filter(pk=user_id, is_active=True).exists()
+    return False
+
+
+def _shed_candidate(request, load):
+    """(priority, credentials_help) when the request would be shed, None to let it through without any lookup"""
+    if load <= min(t for t in SHED_THRESHOLDS.values() if t is not None):
+        return None
+    priority = request_priority(request)
+    threshold = SHED_THRESHOLDS.get(priority, SHED_THRESHOLDS[DEFAULT_PRIORITY])
+    if threshold is None or load <= threshold:
+        return None
+    return priority, priority == 'low' and load <= SHED_THRESHOLDS[AUTHENTICATED_PRIORITY]
+
+
+def _shed_response(priority):
+    metrics.increment(f'load_shedding.shed.{priority}')
+    retry_after = load_shedding_config()['RETRY_AFTER']
+    return JsonResponse(
+        {'detail': 'Server ist ausgelastet, bitte später erneut versuchen.'},
+        status=503,
+        headers={'Retry-After': str(retry_after)},
+    )
+
+
+def _reject(request, load):
+    """503 for requests whose priority is below the current load, credentials are checked only when they matter"""
+    candidate = _shed_candidate(request, load)
+    if candidate is None or (candidate[1] and has_valid_credentials(request)):
+        return None
+    return _shed_response(candidate[0])
+
+
+async def _areject(request, load):
+    candidate = _shed_candidate(request, load)
+    if candidate is None or (candidate[1] and await sync_to_async(has_valid_credentials)(request)):
+        return None
+    return _shed_response(candidate[0])
+
+
+def load_shedding_middleware(get_response):
+    """Counts requests in flight and rejects low-priority ones early while the worker is overloaded"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not load_shedding_config()['ENABLED']:
+                return await get_response(request)
+            started = time.monotonic()
+            monitor.begin(queue_seconds(request))
+            rejected = await _areject(request, monitor.load())
+            if rejected is not None:
+                monitor.end(started, shed=True)
+                return rejected
+            try:
+                return await get_response(request)
+            finally:
+                monitor.end(started)
+        markcoroutinefunction(middleware)
+    else:
+        def middleware(request):
+            if not load_shedding_config()['ENABLED']:
+                return get_response(request)
+            started = time.monotonic()
+            monitor.begin(queue_seconds(request))
+            rejected = _reject(request, monitor.load())
+            if rejected is not None:
+                monitor.end(started, shed=True)
+                return rejected
+            try:
+                return get_response(request)
+            finally:
+                monitor.end(started)
+    return middleware
+
+
+load_shedding_middleware.sync_capable = True
+load_shedding_middleware.async_capable = True
@@ -0,0 +1,168 @@
+"""Provides a production media view with conditional requests, byte ranges, cache headers and sendfile hand-off"""
+import mimetypes
+import os
+import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+HASHED_NAME_RE = re.compile(r'-[0-9a-f]{12}\.[A-Za-z0-9]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _cache_control(path):
+    """Content-hashed variant names never change, everything else may be replaced under the same name"""
+    if HASHED_NAME_RE.search(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={getattr(settings, "MEDIA_CACHE_SECONDS", 3600)}'
+
+
+def _parse_range(header, size):
+    """Returns (start, end) for a single satisfiable byte range, None to serve the full file, False if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    """A stale If-Range validator means the client must get the whole file again"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    return parse_http_date_safe(value) == int(last_modified)
+
+
+def _open_at(full_path, start):
+    handle = open(full_path, 'rb')
+    handle.seek(start)
+    return handle
+
+
+def _stream_range(full_path, start, length):
+    """WSGI: reads the range block by block"""
+    with _open_at(full_path, start) as handle:
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _astream_range(full_path, start, length):
+    """ASGI: same blocks as _stream_range, each read goes through sync_to_async so Django streams instead of buffering"""
+    handle = await sync_to_async(_open_at)(full_path, start)
+    read = sync_to_async(handle.read)
+    try:
+        remaining = length
+        while remaining > 0:
+            chunk = await read(min(STREAM_BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(handle.close)()
+
+
+def _range_response(request, full_path, start, length, **kwargs):
+    stream = _astream_range if isinstance(request, ASGIRequest) else _stream_range
+    response = StreamingHttpResponse(stream(full_path, start, length), **kwargs)
+    response['Content-Length'] = str(length)
+    return response
+
+
+def _sendfile_response(relative_path, full_path):
+    """Lets the front server (Apache/lighttpd or nginx) send the bytes, configured by MEDIA_SENDFILE"""
+    mode = getattr(settings, 'MEDIA_SENDFILE', None)
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = full_path
+    elif mode == 'x-accel-redirect':
+        response = HttpResponse()
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative_path.lstrip('/')
+    else:
+        return None
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Streams a file from MEDIA_ROOT, answers 304/206/416 where appropriate"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Datei nicht gefunden.')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Datei nicht gefunden.')
+    if not os.path.isfile(full_path):
+        raise Http404('Datei nicht gefunden.')
+
+    etag = _etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        for name, value in headers.items():
+            response.headers.setdefault(name, value)
+        return response
+
+    response = _sendfile_response(path, full_path)
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        byte_range = None
+        if request.META.get('HTTP_RANGE') and _if_range_matches(request, etag, stat.st_mtime):
+            byte_range = _parse_range(request.META['HTTP_RANGE'], stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = _range_response(request, full_path, start, length, status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        elif isinstance(request, ASGIRequest):
+            # FileResponse iterates the file synchronously, which ASGI would read into memory first
+            response = _range_response(request, full_path, 0, stat.st_size, content_type=content_type)
+            response['Content-Disposition'] = content_disposition_header(False, os.path.basename(full_path))
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,27 @@
+"""Provides lightweight in-process counters for operational metrics"""
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def increment(name, value=1):
+    """Adds value to the named counter"""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    """Returns a copy of all counters"""
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    """Clears all counters, mainly for benchmarks"""
+    with _lock:
+        _counters.clear()
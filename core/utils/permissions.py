@@ -1,6 +1,13 @@
 """Provides permission library for the project"""
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 from auth_app.models import Profile
+from core.utils.request_cache import cached
+
+
+def get_profile(user_id):
+    """Returns the profile of a user id, shared between sub-requests of a batch"""
+    return cached(('profile', user_id), lambda: Profile.objects.filter(user_id=user_id).first())
+
 
 class IsOwnerOrReadOnly(BasePermission):
     """Read access for everyone, write actions allowed only to the object's owner."""
@@ -19,7 +26,8 @@ class IsBusinessUser(BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return Profile.objects.filter(user=request.user, type='business').exists()
+        profile = get_profile(request.user.id)
+        return bool(profile and profile.type == 'business')
     
     
 class IsCustomerUser(BasePermission):
@@ -31,5 +39,5 @@ class IsCustomerUser(BasePermission):
             return True
         if not request.user or not request.user.is_authenticated:
             return False
-        profile = Profile.objects.filter(user=request.user).first()
+        profile = get_profile(request.user.id)
         return bool(profile and (profile.type or '').lower() == 'customer')
\ No newline at end of file
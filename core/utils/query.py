@@ -1,3 +1,4 @@
+from django.utils.dateparse import parse_date
 from rest_framework.exceptions import ValidationError
 
 def parse_int_param(params, name):
@@ -7,4 +8,17 @@ def parse_int_param(params, name):
         return None
     if not value.isdigit():
         raise ValidationError({name: 'Muss eine ganze Zahl sein.'})
-    return int(value)
\ No newline at end of file
+    return int(value)
+
+def parse_date_param(params, name):
+    """Gets a YYYY-MM-DD query param as date, returns None if not set"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value) if len(value) == 10 else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Muss ein Datum im Format JJJJ-MM-TT sein.'})
+    return parsed
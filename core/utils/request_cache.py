@@ -0,0 +1,32 @@
+"""Provides a request-scoped memo cache that is only active inside an explicit scope (e.g. a batch request)"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_request_cache = ContextVar('request_cache', default=None)
+
+
+@contextmanager
+def request_cache_scope():
+    """Activates a fresh cache for the enclosed block"""
+    token = _request_cache.set({})
+    try:
+        yield
+    finally:
+        _request_cache.reset(token)
+
+
+def cached(key, factory):
+    """Returns the memoized value for key inside a scope, otherwise just calls factory"""
+    store = _request_cache.get()
+    if store is None:
+        return factory()
+    if key not in store:
+        store[key] = factory()
+    return store[key]
+
+
+def clear_request_cache():
+    """Drops all memoized values of the active scope, used after writes"""
+    store = _request_cache.get()
+    if store is not None:
+        store.clear()
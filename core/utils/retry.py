@@ -0,0 +1,79 @@
+"""Provides a transactional retry wrapper for write paths that hit lock or serialization conflicts"""
+import functools
+import logging
+import random
+import time
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CONTENTION_MARKERS = (
+    'database is locked',
+    'database table is locked',
+    'could not serialize access',
+    'deadlock detected',
+    'deadlock found',
+    'lock wait timeout',
+)
+
+DEFAULT_RETRY_SETTINGS = {
+    'ATTEMPTS': 5,
+    'BASE_DELAY': 0.05,
+    'MAX_DELAY': 1.0,
+    'BUDGET_SECONDS': 3.0,
+}
+
+
+def is_contention_error(exc):
+    """True for transient lock/serialization errors that are worth retrying"""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in CONTENTION_MARKERS)
+
+
+def _retry_settings():
+    """Merges project overrides from DB_WRITE_RETRY into the defaults"""
+    return {**DEFAULT_RETRY_SETTINGS, **getattr(settings, 'DB_WRITE_RETRY', {})}
+
+
+def _backoff(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_on_contention(operation, using=DEFAULT_DB_ALIAS):
+    """Runs the wrapped write in its own atomic block and retries it on contention within the configured budget"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if connections[using].in_atomic_block:
+                return func(*args, **kwargs)
+
+            config = _retry_settings()
+            deadline = time.monotonic() + config['BUDGET_SECONDS']
+            attempt = 1
+            while True:
+                try:
+                    with transaction.atomic(using=using):
+                        result = func(*args, **kwargs)
+                except OperationalError as exc:
+                    if not is_contention_error(exc):
+                        raise
+                    delay = _backoff(attempt, config['BASE_DELAY'], config['MAX_DELAY'])
+                    if attempt >= config['ATTEMPTS'] or time.monotonic() + delay > deadline:
+                        metrics.increment(f'db_retry.{operation}.exhausted')
+                        logger.error('Write %s gave up after %s attempts: %s', operation, attempt, exc)
+                        raise
+                    metrics.increment(f'db_retry.{operation}.retries')
+                    logger.warning('Write %s hit contention (attempt %s), retrying in %.3fs', operation, attempt, delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                if attempt > 1:
+                    metrics.increment(f'db_retry.{operation}.recovered')
+                return result
+        return wrapper
+    return decorator
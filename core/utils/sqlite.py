@@ -0,0 +1,33 @@
+"""Provides the SQLite production profile (WAL, pragmas, immediate transactions) used by settings"""
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRODUCTION_CONN_MAX_AGE = 600
+
+
+def sqlite_init_command(pragmas):
+    """Builds the init_command executed by Django on every new SQLite connection"""
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def sqlite_production_options(pragmas=None):
+    """Returns OPTIONS for a SQLite database entry, writers take the lock at BEGIN instead of failing on upgrade"""
+    return {
+        'init_command': sqlite_init_command(pragmas or SQLITE_PRODUCTION_PRAGMAS),
+        'transaction_mode': 'IMMEDIATE',
+    }
+
+
+def apply_sqlite_production_profile(database):
+    """Switches one DATABASES entry to the production profile in place"""
+    database['OPTIONS'] = {**database.get('OPTIONS', {}), **sqlite_production_options()}
+    database['CONN_MAX_AGE'] = SQLITE_PRODUCTION_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = True
+    return database
@@ -0,0 +1,172 @@
+"""Provides token bucket throttles per view scope and client identity, checked in O(1) without database access"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import get_authorization_header
+from rest_framework.throttling import BaseThrottle
+from core.utils import metrics
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+CACHE_KEY_PREFIX = 'throttle:'
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60), None when unset"""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), RATE_PERIODS[period.strip()[0]]
+
+
+def throttle_rate(name):
+    return parse_rate(getattr(settings, 'THROTTLE_RATES', {}).get(name))
+
+
+def throttled_message(wait):
+    return f'Zu viele Anfragen, bitte in {math.ceil(wait or 1)} Sekunden erneut versuchen.'
+
+
+class LocalBucketStore:
+    """Buckets in process memory, least recently used keys are dropped beyond max_keys"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate):
+        """Takes one token, returns 0 when allowed or the seconds until the next token"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / refill_rate
+
+
+class CacheBucketStore:
+    """Buckets in the shared cache so all workers count together, read-modify-write is not atomic (approximate)"""
+
+    def take(self, key, capacity, refill_rate):
+        now = time.time()
+        tokens, stamp = cache.get(CACHE_KEY_PREFIX + key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * refill_rate)
+        allowed = tokens >= 1
+        timeout = math.ceil(capacity / refill_rate) + 1
+        cache.set(CACHE_KEY_PREFIX + key, (tokens - 1 if allowed else tokens, now), timeout=timeout)
+        return 0.0 if allowed else (1 - tokens) / refill_rate
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """Store selected by THROTTLE_BACKEND ('local' or 'cache'), created once per process"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if getattr(settings, 'THROTTLE_BACKEND', 'local') == 'cache':
+                    _store = CacheBucketStore()
+                else:
+                    _store = LocalBucketStore(getattr(settings, 'THROTTLE_LOCAL_MAX_KEYS', 100_000))
+    return _store
+
+
+def _authenticated_user(request):
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+class BucketThrottle(BaseThrottle):
+    """Limits a view's throttle_scope per identity with THROTTLE_RATES['<scope>.<identity>'], no rate means no limit"""
+    identity = None
+
+    def get_identity(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self._wait = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = throttle_rate(f'{scope}.{self.identity}') if scope else None
+        ident = self.get_identity(request) if rate else None
+        if ident is None:
+            return True
+        capacity, period = rate
+        wait = get_bucket_store().take(f'{scope}.{self.identity}:{ident}', capacity, capacity / period)
+        if not wait:
+            return True
+        metrics.increment(f'throttle.{scope}.{self.identity}.rejected')
+        self._wait = wait
+        return False
+
+    def wait(self):
+        return self._wait
+
+
+class IPThrottle(BucketThrottle):
+    """Every request by client address (honours NUM_PROXIES for X-Forwarded-For)"""
+    identity = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class AnonThrottle(IPThrottle):
+    """Only unauthenticated requests, by client address"""
+    identity = 'anon'
+
+    def get_identity(self, request):
+        return None if _authenticated_user(request) else self.get_ident(request)
+
+
+class UserThrottle(BucketThrottle):
+    """Only authenticated requests, by user id"""
+    identity = 'user'
+
+    def get_identity(self, request):
+        user = _authenticated_user(request)
+        return user.pk if user else None
+
+
+class TokenThrottle(BucketThrottle):
+    """Requests carrying an auth token, by a hash of the token"""
+    identity = 'token'
+
+    def get_identity(self, request):
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != b'token':
+            return None
+        return hashlib.sha256(auth[1]).hexdigest()[:32]
+
+
+class UsernameThrottle(BucketThrottle):
+    """Login attempts per submitted username or email and client address, other addresses can still log in"""
+    identity = 'username'
+
+    def get_identity(self, request):
+        data = getattr(request, 'data', None) or {}
+        name = str(data.get('username') or data.get('email') or '').strip().casefold()[:150]
+        if not name:
+            return None
+        return f'{self.get_ident(request)}:{name}'
+
+
+def check_throttles(request, scope, throttle_classes):
+    """Async views: returns the longest wait in seconds, or None when every throttle allows the request"""
+    view = SimpleNamespace(throttle_scope=scope)
+    waits = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    return max(waits) if waits else None
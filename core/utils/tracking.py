@@ -0,0 +1,121 @@
+"""Provides change tracking so model saves write only modified columns and skip no-op saves"""
+from django.db import models
+
+_UNCOMMITTED = object()
+_CURRENT = object()
+_json_attnames = {}
+
+
+def copy_json(value):
+    """Deep copy of a decoded JSON value, much cheaper than copy.deepcopy because the leaves are immutable"""
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy_json(item) for key, item in value.items()}
+    return value
+
+
+def assign_changed(obj, values):
+    """Sets only differing attributes and returns the names of the changed fields (for models without tracking)"""
+    changed = []
+    for name, value in values.items():
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed.append(name)
+    return changed
+
+
+class ChangeTrackingMixin:
+    """Remembers the loaded column values, save() then only writes what changed.
+
+    Loading only keeps a reference to the fetched row, the snapshot is built when a save first needs it. JSON
+    values are the exception: the row keeps a copy of them, so changing a list or dict in place is still seen.
+    """
+
+    @classmethod
+    def _json_fields(cls):
+        if cls not in _json_attnames:
+            _json_attnames[cls] = frozenset(f.attname for f in cls._meta.concrete_fields if isinstance(f, models.JSONField))
+        return _json_attnames[cls]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        json_fields = cls._json_fields()
+        if json_fields:
+            values = [copy_json(v) if name in json_fields else v for name, v in zip(field_names, values)]
+        instance._loaded_row = (field_names, values)
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.mark_clean(kwargs.get('fields'))
+
+    def _tracked_fields(self):
+        return [f for f in self._meta.concrete_fields if not f.primary_key]
+
+    def _comparable(self, field, value=_CURRENT):
+        """Returns a value that compares equal only if the column would be written unchanged"""
+        if value is _CURRENT:
+            value = self.__dict__.get(field.attname)
+        if isinstance(field, models.FileField):
+            if value is not None and not isinstance(value, str):
+                return value.name if getattr(value, '_committed', True) else _UNCOMMITTED
+            return value or None
+        return value
+
+    def _loaded(self):
+        """The clean state as {attname: value}, built from the fetched row on first use, None if never loaded"""
+        row = self.__dict__.pop('_loaded_row', None)
+        if row is not None:
+            loaded = dict(zip(*row))
+            self._loaded_values = {
+                f.attname: self._comparable(f, loaded[f.attname]) for f in self._tracked_fields() if f.attname in loaded
+            }
+        return self.__dict__.get('_loaded_values')
+
+    def mark_clean(self, fields=None):
+        """Stores the current values of loaded fields as the clean state, e.g. after a bulk_update"""
+        if fields is None:
+            self.__dict__.pop('_loaded_row', None)
+            loaded = {}
+        else:
+            loaded = self._loaded() or {}
+        deferred = self.get_deferred_fields()
+        for field in self._tracked_fields():
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                value = self._comparable(field)
+                loaded[field.attname] = copy_json(value) if field.attname in self._json_fields() else value
+        self._loaded_values = loaded
+
+    def initial_value(self, name):
+        """Returns the value a field had when it was loaded or last saved"""
+        field = self._meta.get_field(name)
+        return (self._loaded() or {}).get(field.attname)
+
+    def changed_fields(self):
+        """Names of modified fields, None when the instance was never loaded or saved"""
+        loaded = self._loaded()
+        if loaded is None:
+            return None
+        changed = []
+        for field in self._tracked_fields():
+            if field.attname in loaded:
+                if self._comparable(field) != loaded[field.attname]:
+                    changed.append(field.name)
+            elif field.attname in self.__dict__:
+                changed.append(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            changed = self.changed_fields()
+            if changed is not None:
+                if not changed:
+                    return
+                auto_now = [f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)]
+                kwargs['update_fields'] = [*changed, *[name for name in auto_now if name not in changed]]
+        super().save(*args, **kwargs)
+        self.mark_clean(kwargs.get('update_fields'))
@@ -0,0 +1,92 @@
+"""Provides a streaming upload handler that rejects oversized or non-image uploads before they are buffered"""
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULT_UPLOAD_LIMITS = {
+    'default': 5 * 1024 * 1024,
+    'offer_image': 5 * 1024 * 1024,
+    'profile_file': 2 * 1024 * 1024,
+}
+FORM_OVERHEAD_BYTES = 64 * 1024
+IMAGE_CONTENT_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp'}
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Datei ist zu groß.'
+    default_code = 'upload_too_large'
+
+
+class UnsupportedUpload(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = 'Nur Bilddateien (JPEG, PNG, GIF, WebP) sind erlaubt.'
+    default_code = 'unsupported_upload'
+
+
+def upload_limit(name):
+    """Returns the byte limit for an endpoint from settings.UPLOAD_LIMITS, falling back to 'default'"""
+    limits = {**DEFAULT_UPLOAD_LIMITS, **getattr(settings, 'UPLOAD_LIMITS', {})}
+    return limits.get(name, limits['default'])
+
+
+def _format_size(num_bytes):
+    if num_bytes >= 1024 * 1024:
+        return f'{num_bytes / (1024 * 1024):g} MB'
+    return f'{num_bytes / 1024:g} KB'
+
+
+def sniff_image_type(head):
+    """Detects the image type from the magic bytes of the first chunk"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+class LimitedImageUploadHandler(TemporaryFileUploadHandler):
+    """Streams files to disk chunk by chunk and aborts on the first sign of an oversized or non-image upload"""
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or upload_limit('default')
+        self.limit_text = f'Datei ist zu groß (maximal {_format_size(self.max_bytes)}).'
+
+    def _abort(self, exc):
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+        raise exc
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > self.max_bytes + FORM_OVERHEAD_BYTES:
+            raise UploadTooLarge(self.limit_text)
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        if (content_type or '').lower() not in IMAGE_CONTENT_TYPES:
+            raise UnsupportedUpload()
+        if content_length and content_length > self.max_bytes:
+            raise UploadTooLarge(self.limit_text)
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and sniff_image_type(raw_data[:12]) is None:
+            self._abort(UnsupportedUpload())
+        if start + len(raw_data) > self.max_bytes:
+            self._abort(UploadTooLarge(self.limit_text))
+        return super().receive_data_chunk(raw_data, start)
+
+
+class LimitedUploadMixin:
+    """Installs LimitedImageUploadHandler with the view's upload_limit before DRF parses the body"""
+    upload_limit = 'default'
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [LimitedImageUploadHandler(request, max_bytes=upload_limit(self.upload_limit))]
+        return super().initialize_request(request, *args, **kwargs)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Build the in-process autocomplete index before the worker takes requests
+from coderr_app.queries.autocomplete_services import warm_autocomplete_index  # noqa: E402
+
+warm_autocomplete_index()